@@ -1,11 +1,20 @@
 #!/bin/bash
 # Cron job script for automated daily backups
 # Usage: Add to crontab: 0 2 * * * /path/to/pet-adoption/auto-backup.sh
+#
+# Each night's dump is stored as a snapshot in the deduplicated repository
+# under backups/repo, where rows that did not change since earlier snapshots
+# take no extra space. Snapshots are pruned grandfather-father-son style
+# (KEEP_DAILY / KEEP_WEEKLY / KEEP_MONTHLY). To restore one:
+#   python manage.py backup_repo list
+#   python manage.py backup_repo restore --snapshot <id> --target /app/backups/restore
+#   python manage.py load_data --input /app/backups/restore
 
 PROJECT_DIR="/home/dev_f/basic/Pet-Adoption"
 BACKUP_DIR="$PROJECT_DIR/backups"
-TIMESTAMP=$(date +%Y%m%d_%H%M%S)
-DATED_BACKUP_DIR="$BACKUP_DIR/backup_$TIMESTAMP"
+KEEP_DAILY="${KEEP_DAILY:-7}"
+KEEP_WEEKLY="${KEEP_WEEKLY:-4}"
+KEEP_MONTHLY="${KEEP_MONTHLY:-6}"
 
 cd "$PROJECT_DIR"
 
@@ -17,16 +26,19 @@ fi
 
 echo "[$(date)] Starting automated backup..."
 
-# Create timestamped backup directory
-mkdir -p "$DATED_BACKUP_DIR"
+# Fold the SQLite write-ahead log back into the database file
+docker-compose exec -T web python manage.py checkpoint_wal
 
-# Dump data
-docker-compose exec -T web python manage.py dump_data --output /app/backups/current
+# Dump data uncompressed into a fresh staging directory; the repository
+# compresses chunks itself, and pre-compressed files would not deduplicate
+rm -rf "$BACKUP_DIR/staging"
+docker-compose exec -T web python manage.py dump_data --stream --output /app/backups/staging
 
-# Create a copy with timestamp
-cp -r "$BACKUP_DIR/current"/* "$DATED_BACKUP_DIR/"
+# Store it as a snapshot and apply the retention policy
+docker-compose exec -T web python manage.py backup_repo store --source /app/backups/staging
+docker-compose exec -T web python manage.py backup_repo prune \
+    --keep-daily "$KEEP_DAILY" --keep-weekly "$KEEP_WEEKLY" --keep-monthly "$KEEP_MONTHLY"
 
-# Keep only last 7 backups
-find "$BACKUP_DIR" -maxdepth 1 -name "backup_*" -type d -mtime +7 -exec rm -rf {} \;
+rm -rf "$BACKUP_DIR/staging"
 
-echo "[$(date)] Backup completed. Saved to $DATED_BACKUP_DIR"
+echo "[$(date)] Backup completed. Stored in $BACKUP_DIR/repo"
@@ -1,14 +1,20 @@
 #!/bin/bash
-# Script to backup database to JSON
+# Script to backup database to JSON, or to a SQLite snapshot with BACKUP_BACKEND=sqlite
 
 set -e
 
 BACKUP_DIR="${1:-.backups}"
-echo "Dumping database to JSON backups in $BACKUP_DIR..."
+BACKUP_BACKEND="${BACKUP_BACKEND:-json}"
 
 mkdir -p "$BACKUP_DIR"
 
-python manage.py dump_data --output "$BACKUP_DIR"
+if [ "$BACKUP_BACKEND" = "sqlite" ]; then
+    echo "Snapshotting SQLite database to $BACKUP_DIR..."
+    python manage.py snapshot_db --output "$BACKUP_DIR" --compress gzip
+else
+    echo "Dumping database to JSON backups in $BACKUP_DIR..."
+    python manage.py dump_data --output "$BACKUP_DIR"
+fi
 
 echo "Backup completed successfully!"
-ls -lh "$BACKUP_DIR"/*.json
+ls -lh "$BACKUP_DIR"
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,11 +30,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the whole request
+    'pet_adoption.middleware.RequestMetricsMiddleware',
+    'pet_adoption.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # After authentication, so staff users can ask for a profile
+    'pet_adoption.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -44,17 +50,31 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [ BASE_DIR / 'templates' ],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compile each template once per process instead of on every
+            # render. runserver still picks up edits: it resets the cache
+            # when a template changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
+# Rendered page fragments ({% fragment %}) are cached this many seconds. Keys
+# embed a digest of the templates, so a deploy that changes them starts with
+# fresh fragments; TEMPLATE_FRAGMENT_VERSION replaces the digest when set.
+TEMPLATE_FRAGMENT_TIMEOUT = int(os.environ.get('TEMPLATE_FRAGMENT_TIMEOUT', 24 * 60 * 60))
+TEMPLATE_FRAGMENT_VERSION = os.environ.get('TEMPLATE_FRAGMENT_VERSION', '')
+
 WSGI_APPLICATION = 'core.wsgi.application'
 
 
@@ -68,6 +88,86 @@ DATABASES = {
     }
 }
 
+# SQLite connection profile. 'production' (the default) puts the database in
+# WAL mode so readers no longer block behind the gunicorn workers' writes,
+# waits for the write lock instead of failing with "database is locked", and
+# keeps connections open between requests. 'basic' keeps SQLite's defaults.
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+
+# Applied to every new connection in the production profile
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # Durable as of the last checkpoint; WAL mode cannot be corrupted by a crash
+    'synchronous': 'NORMAL',
+    # Milliseconds to wait for the write lock
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    # Negative values are KiB: 32 MB of page cache per connection
+    'cache_size': -32000,
+    'temp_store': 'MEMORY',
+}
+
+if SQLITE_PROFILE == 'production':
+    DATABASES['default'].update({
+        'OPTIONS': {
+            'init_command': ';'.join(
+                f'PRAGMA {name} = {value}' for name, value in SQLITE_PRAGMAS.items()
+            ),
+            # Take the write lock when a transaction begins: a deferred
+            # transaction that reads and then writes fails immediately if
+            # another connection wrote in between, regardless of busy_timeout.
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+
+# Request metrics, slow queries and profiling
+# Every response gets a Server-Timing header with its SQL, serialization and
+# render time, and per-route latency histograms of all gunicorn workers are
+# served at /metrics. Each worker writes its histograms to METRICS_DIR at most
+# every METRICS_FLUSH_INTERVAL seconds. REQUEST_METRICS=0 turns all of it off.
+# With METRICS_TOKEN set, /metrics answers only requests carrying it as an
+# "Authorization: Bearer" header (Prometheus' bearer_token).
+REQUEST_METRICS = os.environ.get('REQUEST_METRICS', '1') == '1'
+METRICS_DIR = Path(os.environ.get('METRICS_DIR', BASE_DIR / 'metrics'))
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 10))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Statements taking at least SLOW_QUERY_THRESHOLD_MS are appended to
+# SLOW_QUERY_LOG with their query plan; summarize it with slow_query_report.
+# An empty SLOW_QUERY_LOG turns the log off.
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', str(BASE_DIR / 'logs' / 'slow_queries.jsonl'))
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+
+# Requests with an X-Profile-Token header matching PROFILING_TOKEN, or a staff
+# user's ?profile=1, are profiled with cProfile and a stack sampler taking a
+# sample every PROFILING_INTERVAL seconds. PROFILING_SAMPLE_RATE (0 to 1) of
+# other requests get the stack sampler only. About the newest
+# PROFILING_MAX_PROFILES are kept in PROFILING_DIR and listed at /admin/profiles/; an empty
+# PROFILING_DIR turns profiling off.
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN', '')
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_INTERVAL = float(os.environ.get('PROFILING_INTERVAL', 0.01))
+PROFILING_MAX_PROFILES = int(os.environ.get('PROFILING_MAX_PROFILES', 500))
+
+
+# Cache
+# A file-based cache is shared by all gunicorn workers on the node, so
+# invalidations made by one worker are seen by the others.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    }
+}
+
+# Lifetime of cached API responses; entries are also invalidated on change
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -109,10 +209,32 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# collectstatic minifies CSS/JS, writes content-hashed copies with a manifest
+# and precompresses them for nginx's gzip_static. {% static %} links to the
+# hashed names whenever DEBUG is off.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'pet_adoption.storage.PrecompressedManifestStaticFilesStorage',
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Threads per process that render resized copies of uploaded pet images
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+
+# Chunked pet image uploads: partial files are kept here until finalized,
+# outside MEDIA_ROOT so they are never served
+CHUNKED_UPLOAD_DIR = Path(os.environ.get('CHUNKED_UPLOAD_DIR', BASE_DIR / 'uploads'))
+CHUNKED_UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+# Largest chunk accepted in one request; stays under nginx client_max_body_size
+CHUNKED_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -18,13 +18,17 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from pet_adoption.views import index, contact
+from pet_adoption.admin import profile_file_view, profiles_view
+from pet_adoption.views import index, contact, prometheus_metrics
 
 urlpatterns = [
+    path('admin/profiles/', admin.site.admin_view(profiles_view), name='admin-profiles'),
+    path('admin/profiles/<str:filename>', admin.site.admin_view(profile_file_view), name='admin-profile-file'),
     path('admin/', admin.site.urls),
     path('', index, name='index'),
     path('contact/', contact, name='contact'),
     path('api/v1/', include('pet_adoption.api_urls')),
+    path('metrics', prometheus_metrics, name='metrics'),
 ]
 
 # Serve media files in development
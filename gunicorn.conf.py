@@ -0,0 +1,11 @@
+# Read by gunicorn from the working directory, so it applies to both the
+# Dockerfile CMD and the docker-compose command.
+import os
+
+
+def on_starting(server):
+    # Workers of a previous run left their request histograms in METRICS_DIR;
+    # /metrics would keep summing them into this run's totals.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    from pet_adoption import metrics
+    metrics.clear()
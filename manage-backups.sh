@@ -6,6 +6,15 @@ set -e
 PROJECT_DIR="/home/dev_f/basic/Pet-Adoption"
 cd "$PROJECT_DIR"
 
+# json: dump_data/load_data into backups/current
+# sqlite: snapshot_db/restore_snapshot into backups/snapshot
+BACKUP_BACKEND="${BACKUP_BACKEND:-json}"
+if [ "$BACKUP_BACKEND" = "sqlite" ]; then
+    BACKUP_NAME="snapshot"
+else
+    BACKUP_NAME="current"
+fi
+
 # Color codes
 RED='\033[0;31m'
 GREEN='\033[0;32m'
@@ -17,8 +26,8 @@ usage() {
     echo "Usage: $0 {backup|restore|status|schedule|unschedule}"
     echo ""
     echo "Commands:"
-    echo "  backup      - Dump current database to JSON"
-    echo "  restore     - Load database from JSON backup"
+    echo "  backup      - Dump current database to JSON (or snapshot it, BACKUP_BACKEND=sqlite)"
+    echo "  restore     - Load database from JSON backup (or snapshot, BACKUP_BACKEND=sqlite)"
     echo "  status      - Show backup status"
     echo "  schedule    - Setup daily automated backups (cron)"
     echo "  unschedule  - Remove automated backups (cron)"
@@ -33,11 +42,15 @@ backup() {
         exit 1
     fi
     
-    docker-compose exec -T web python manage.py dump_data --output /app/backups/current
+    if [ "$BACKUP_BACKEND" = "sqlite" ]; then
+        docker-compose exec -T web python manage.py snapshot_db --output /app/backups/snapshot --compress gzip
+    else
+        docker-compose exec -T web python manage.py dump_data --output /app/backups/current
+    fi
     
     echo -e "${GREEN}Backup completed successfully!${NC}"
-    echo -e "${YELLOW}Backup location: ./backups/current/${NC}"
-    ls -lh ./backups/current/*.json
+    echo -e "${YELLOW}Backup location: ./backups/$BACKUP_NAME/${NC}"
+    ls -lh "./backups/$BACKUP_NAME/"
 }
 
 restore() {
@@ -53,7 +66,11 @@ restore() {
             exit 1
         fi
         
-        docker-compose exec -T web python manage.py load_data --input /app/backups/current
+        if [ "$BACKUP_BACKEND" = "sqlite" ]; then
+            docker-compose exec -T web python manage.py restore_snapshot --input /app/backups/snapshot
+        else
+            docker-compose exec -T web python manage.py load_data --input /app/backups/current
+        fi
         
         echo -e "${GREEN}Restore completed successfully!${NC}"
     else
@@ -65,19 +82,25 @@ status() {
     echo -e "${BLUE}Backup Status${NC}"
     echo "================================"
     
-    if [ -d "./backups/current" ]; then
+    if [ -d "./backups/$BACKUP_NAME" ]; then
         echo -e "${GREEN}Latest backup files:${NC}"
-        ls -lh ./backups/current/*.json 2>/dev/null || echo "No backup files found"
+        ls -lh "./backups/$BACKUP_NAME/" 2>/dev/null || echo "No backup files found"
         echo ""
         echo -e "${GREEN}Total backup size:${NC}"
-        du -sh ./backups/current 2>/dev/null || echo "N/A"
+        du -sh "./backups/$BACKUP_NAME" 2>/dev/null || echo "N/A"
     else
         echo -e "${YELLOW}No backups found${NC}"
     fi
     
     echo ""
     echo -e "${BLUE}Backup History:${NC}"
-    ls -ldt ./backups/backup_*/ 2>/dev/null | head -5 || echo "No backup history"
+    if [ -d "./backups/repo/snapshots" ]; then
+        docker-compose exec -T web python manage.py backup_repo list | tail -5
+        echo -e "${GREEN}Repository size:${NC}"
+        du -sh ./backups/repo
+    else
+        echo "No backup history"
+    fi
 }
 
 schedule() {
@@ -1,5 +1,12 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import Pet, Adoption, Contact, Volunteer, Donation, NewsletterSubscription
+from django.db import transaction
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from django.utils import timezone
+from . import cache, donation_stats, profiling
+from .backups import record_changes
+from .models import Pet, Adoption, Contact, Volunteer, Donation, DonationTotal, NewsletterSubscription
 
 
 @admin.register(Pet)
@@ -27,11 +34,13 @@ class PetAdmin(admin.ModelAdmin):
     actions = ['mark_as_available', 'mark_as_adopted']
     
     def mark_as_available(self, request, queryset):
-        queryset.update(status='available')
+        queryset.update(status='available', updated_at=timezone.now())
+        transaction.on_commit(lambda: cache.invalidate(cache.PETS))
     mark_as_available.short_description = 'Mark selected pets as Available'
     
     def mark_as_adopted(self, request, queryset):
-        queryset.update(status='adopted')
+        queryset.update(status='adopted', updated_at=timezone.now())
+        transaction.on_commit(lambda: cache.invalidate(cache.PETS))
     mark_as_adopted.short_description = 'Mark selected pets as Adopted'
 
 
@@ -39,6 +48,7 @@ class PetAdmin(admin.ModelAdmin):
 class AdoptionAdmin(admin.ModelAdmin):
     """Admin interface for Adoption model"""
     list_display = ['adopter_name', 'pet', 'status', 'applied_at', 'approved_at']
+    list_select_related = ['pet']
     list_filter = ['status', 'applied_at', 'pet__pet_type']
     search_fields = ['adopter_name', 'adopter_email', 'pet__name']
     readonly_fields = ['applied_at', 'approved_at', 'completed_at', 'updated_at']
@@ -63,15 +73,15 @@ class AdoptionAdmin(admin.ModelAdmin):
     actions = ['approve_adoption', 'reject_adoption', 'complete_adoption']
     
     def approve_adoption(self, request, queryset):
-        queryset.update(status='approved')
+        queryset.update(status='approved', updated_at=timezone.now())
     approve_adoption.short_description = 'Approve selected adoptions'
     
     def reject_adoption(self, request, queryset):
-        queryset.update(status='rejected')
+        queryset.update(status='rejected', updated_at=timezone.now())
     reject_adoption.short_description = 'Reject selected adoptions'
     
     def complete_adoption(self, request, queryset):
-        queryset.update(status='completed')
+        queryset.update(status='completed', updated_at=timezone.now())
     complete_adoption.short_description = 'Complete selected adoptions'
 
 
@@ -100,11 +110,11 @@ class ContactAdmin(admin.ModelAdmin):
     actions = ['mark_as_read', 'mark_as_unread']
     
     def mark_as_read(self, request, queryset):
-        queryset.update(is_read=True)
+        queryset.update(is_read=True, updated_at=timezone.now())
     mark_as_read.short_description = 'Mark selected as read'
     
     def mark_as_unread(self, request, queryset):
-        queryset.update(is_read=False)
+        queryset.update(is_read=False, updated_at=timezone.now())
     mark_as_unread.short_description = 'Mark selected as unread'
 
 
@@ -133,11 +143,11 @@ class VolunteerAdmin(admin.ModelAdmin):
     actions = ['approve_volunteer', 'reject_volunteer']
     
     def approve_volunteer(self, request, queryset):
-        queryset.update(status='approved')
+        queryset.update(status='approved', updated_at=timezone.now())
     approve_volunteer.short_description = 'Approve selected volunteers'
     
     def reject_volunteer(self, request, queryset):
-        queryset.update(status='rejected')
+        queryset.update(status='rejected', updated_at=timezone.now())
     reject_volunteer.short_description = 'Reject selected volunteers'
 
 
@@ -166,14 +176,27 @@ class DonationAdmin(admin.ModelAdmin):
     actions = ['mark_as_completed', 'mark_as_failed']
     
     def mark_as_completed(self, request, queryset):
-        queryset.update(payment_status='completed')
+        donation_stats.update_payment_status(queryset, 'completed')
     mark_as_completed.short_description = 'Mark as Completed'
     
     def mark_as_failed(self, request, queryset):
-        queryset.update(payment_status='failed')
+        donation_stats.update_payment_status(queryset, 'failed')
     mark_as_failed.short_description = 'Mark as Failed'
 
 
+@admin.register(DonationTotal)
+class DonationTotalAdmin(admin.ModelAdmin):
+    """Read-only admin for the running donation totals"""
+    list_display = ['period', 'currency', 'total_amount', 'donation_count', 'updated_at']
+    list_filter = ['currency']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(NewsletterSubscription)
 class NewsletterSubscriptionAdmin(admin.ModelAdmin):
     """Admin interface for Newsletter Subscription model"""
@@ -189,10 +212,29 @@ class NewsletterSubscriptionAdmin(admin.ModelAdmin):
     actions = ['activate_subscription', 'deactivate_subscription']
     
     def activate_subscription(self, request, queryset):
+        record_changes(NewsletterSubscription, queryset.values_list('pk', flat=True), 'save')
         queryset.update(is_active=True)
     activate_subscription.short_description = 'Activate subscriptions'
     
     def deactivate_subscription(self, request, queryset):
+        record_changes(NewsletterSubscription, queryset.values_list('pk', flat=True), 'save')
         queryset.update(is_active=False)
     deactivate_subscription.short_description = 'Deactivate subscriptions'
 
+
+def profiles_view(request):
+    """Captured request profiles, grouped by endpoint"""
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'profiles': profiling.list_profiles(),
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+    }
+    return render(request, 'admin/pet_adoption/profiles.html', context)
+
+
+def profile_file_view(request, filename):
+    path = profiling.profile_path(filename)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename)
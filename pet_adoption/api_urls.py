@@ -2,7 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     PetViewSet, AdoptionViewSet, ContactViewSet,
-    VolunteerViewSet, DonationViewSet, NewsletterSubscriptionViewSet
+    VolunteerViewSet, DonationViewSet, NewsletterSubscriptionViewSet,
+    ImageUploadViewSet
 )
 
 # Create router and register viewsets
@@ -13,6 +14,7 @@ router.register(r'contacts', ContactViewSet, basename='contact')
 router.register(r'volunteers', VolunteerViewSet, basename='volunteer')
 router.register(r'donations', DonationViewSet, basename='donation')
 router.register(r'newsletter', NewsletterSubscriptionViewSet, basename='newsletter')
+router.register(r'uploads', ImageUploadViewSet, basename='upload')
 
 app_name = 'pet_adoption'
 
@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.db.models.signals import post_migrate
 
 
 class PetAdoptionConfig(AppConfig):
     name = 'pet_adoption'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import check_fts_columns, check_fts_triggers, restore_missing_triggers
+        checks.register(check_fts_columns)
+        checks.register(check_fts_triggers, checks.Tags.database)
+        post_migrate.connect(restore_missing_triggers, sender=self)
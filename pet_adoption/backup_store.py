@@ -0,0 +1,241 @@
+import fcntl
+import hashlib
+import json
+import os
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.utils import timezone
+
+
+# Content-defined chunking on line boundaries: a chunk ends after a line whose
+# CRC hits BOUNDARY_MASK, once it is at least MIN_CHUNK long, or at
+# MAX_CHUNK. Inserting or deleting rows in a dump therefore only changes the
+# chunks around the edit, and every other chunk is stored once and shared by
+# all snapshots that contain it.
+MIN_CHUNK = 16 * 1024
+MAX_CHUNK = 1024 * 1024
+BOUNDARY_MASK = 0x3f
+
+
+class RepositoryError(Exception):
+    pass
+
+
+def iter_chunks(f):
+    """Split the binary stream ``f`` into content-defined chunks"""
+    chunk = bytearray()
+    for line in f:
+        # Lines can be arbitrarily long in binary files
+        while len(chunk) + len(line) > MAX_CHUNK:
+            cut = MAX_CHUNK - len(chunk)
+            chunk += line[:cut]
+            line = line[cut:]
+            yield bytes(chunk)
+            chunk.clear()
+        chunk += line
+        if len(chunk) >= MIN_CHUNK and zlib.crc32(line) & BOUNDARY_MASK == 0:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+
+def retained(snapshots, daily=7, weekly=4, monthly=6):
+    """
+    Grandfather-father-son retention: the newest snapshot of each of the
+    last ``daily`` days, ``weekly`` ISO weeks and ``monthly`` months that
+    have snapshots. Returns the set of snapshot ids to keep.
+    """
+    keep = set()
+    periods = (
+        (daily, lambda created: created.date()),
+        (weekly, lambda created: created.isocalendar()[:2]),
+        (monthly, lambda created: (created.year, created.month)),
+    )
+    newest_first = sorted(snapshots, key=lambda snapshot: snapshot['created_at'], reverse=True)
+    for count, period_of in periods:
+        seen = []
+        for snapshot in newest_first:
+            period = period_of(timezone.localtime(datetime.fromisoformat(snapshot['created_at'])))
+            if period in seen:
+                continue
+            if len(seen) == count:
+                break
+            seen.append(period)
+            keep.add(snapshot['id'])
+    return keep
+
+
+class BackupRepository:
+    """
+    Content-addressed store of backup directories.
+
+    ``chunks/<xx>/<sha256>`` holds each unique chunk once, zlib-compressed;
+    ``snapshots/<id>.json`` lists every file of a stored directory with its
+    size, checksum and chunk hashes. Chunks are written before the snapshot
+    that references them, so an interrupted store only leaves unreferenced
+    chunks behind for the next garbage collection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.chunk_dir = os.path.join(path, 'chunks')
+        self.snapshot_dir = os.path.join(path, 'snapshots')
+
+    def init(self):
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+
+    @contextmanager
+    def lock(self):
+        """Serialize commands that modify the repository"""
+        self.init()
+        with open(os.path.join(self.path, 'lock'), 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def chunk_path(self, digest):
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f'{path}.tmp'
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+
+    def store(self, source_dir):
+        """Store every file under ``source_dir`` as a new snapshot; returns (snapshot, stats)"""
+        stats = {'files': 0, 'bytes': 0, 'chunks': 0, 'new_chunks': 0, 'new_bytes': 0}
+        files = {}
+        for root, dirs, names in os.walk(source_dir):
+            dirs.sort()
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                relpath = os.path.relpath(path, source_dir)
+                files[relpath] = self.store_file(path, stats)
+                stats['files'] += 1
+
+        created_at = timezone.now()
+        digest = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+        snapshot = {
+            'id': f'{created_at:%Y%m%dT%H%M%S}-{digest[:8]}',
+            'created_at': created_at.isoformat(),
+            'source': os.path.abspath(source_dir),
+            'files': files,
+        }
+        self.write_atomic(
+            os.path.join(self.snapshot_dir, f'{snapshot["id"]}.json'),
+            json.dumps(snapshot, indent=2).encode()
+        )
+        return snapshot, stats
+
+    def store_file(self, path, stats):
+        sha256 = hashlib.sha256()
+        chunks = []
+        size = 0
+        with open(path, 'rb') as f:
+            for chunk in iter_chunks(f):
+                digest = hashlib.sha256(chunk).hexdigest()
+                sha256.update(chunk)
+                size += len(chunk)
+                chunks.append(digest)
+                stats['chunks'] += 1
+                if not os.path.exists(self.chunk_path(digest)):
+                    compressed = zlib.compress(chunk, 6)
+                    self.write_atomic(self.chunk_path(digest), compressed)
+                    stats['new_chunks'] += 1
+                    stats['new_bytes'] += len(compressed)
+        stats['bytes'] += size
+        return {'size': size, 'sha256': sha256.hexdigest(), 'chunks': chunks}
+
+    def snapshots(self):
+        """Every snapshot, oldest first"""
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        snapshots = [
+            self.load_snapshot(name[:-len('.json')])
+            for name in os.listdir(self.snapshot_dir) if name.endswith('.json')
+        ]
+        return sorted(snapshots, key=lambda snapshot: snapshot['created_at'])
+
+    def load_snapshot(self, snapshot_id):
+        path = os.path.join(self.snapshot_dir, f'{snapshot_id}.json')
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise RepositoryError(f'No snapshot {snapshot_id} in {self.path}')
+
+    def read_chunk(self, digest):
+        try:
+            with open(self.chunk_path(digest), 'rb') as f:
+                data = zlib.decompress(f.read())
+        except FileNotFoundError:
+            raise RepositoryError(f'Missing chunk {digest}')
+        except zlib.error:
+            raise RepositoryError(f'Corrupt chunk {digest}')
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise RepositoryError(f'Chunk {digest} does not match its hash')
+        return data
+
+    def verify(self, snapshot):
+        """Return the problems found re-reading every file of ``snapshot``"""
+        problems = []
+        for relpath, entry in sorted(snapshot['files'].items()):
+            sha256 = hashlib.sha256()
+            try:
+                for digest in entry['chunks']:
+                    sha256.update(self.read_chunk(digest))
+            except RepositoryError as e:
+                problems.append(f'{relpath}: {e}')
+                continue
+            if sha256.hexdigest() != entry['sha256']:
+                problems.append(f'{relpath}: content does not match its checksum')
+        return problems
+
+    def restore(self, snapshot, target_dir):
+        """Write the files of ``snapshot`` into ``target_dir``, each checked before it is moved into place"""
+        for relpath, entry in sorted(snapshot['files'].items()):
+            path = os.path.join(target_dir, relpath)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp = f'{path}.tmp'
+            sha256 = hashlib.sha256()
+            with open(temp, 'wb') as f:
+                for digest in entry['chunks']:
+                    data = self.read_chunk(digest)
+                    sha256.update(data)
+                    f.write(data)
+            if sha256.hexdigest() != entry['sha256']:
+                os.remove(temp)
+                raise RepositoryError(f'{relpath}: content does not match its checksum')
+            os.replace(temp, path)
+
+    def forget(self, snapshot_ids):
+        for snapshot_id in snapshot_ids:
+            os.remove(os.path.join(self.snapshot_dir, f'{snapshot_id}.json'))
+
+    def collect_garbage(self, dry_run=False):
+        """Delete chunks no snapshot references; returns (chunks, bytes) freed"""
+        referenced = {
+            digest
+            for snapshot in self.snapshots()
+            for entry in snapshot['files'].values()
+            for digest in entry['chunks']
+        }
+        freed = freed_bytes = 0
+        for root, dirs, names in os.walk(self.chunk_dir):
+            for name in names:
+                if name in referenced:
+                    continue
+                path = os.path.join(root, name)
+                freed += 1
+                freed_bytes += os.path.getsize(path)
+                if not dry_run:
+                    os.remove(path)
+        return freed, freed_bytes
@@ -0,0 +1,219 @@
+import bz2
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.apps import apps
+from django.db.models.functions import Cast
+
+from .models import ChangeLog
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for zstd-compressed backups
+    zstandard = None
+
+
+# Compression name -> (file suffix, binary writer factory)
+COMPRESSORS = {
+    'none': ('', lambda path: open(path, 'wb')),
+    'gzip': ('.gz', lambda path: gzip.open(path, 'wb', compresslevel=6)),
+    'bz2': ('.bz2', lambda path: bz2.open(path, 'wb')),
+    'xz': ('.xz', lambda path: lzma.open(path, 'wb')),
+    'zstd': ('.zst', lambda path: zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'))),
+}
+
+# File suffix -> binary reader factory
+DECOMPRESSORS = {
+    '.gz': lambda path: gzip.open(path, 'rb'),
+    '.bz2': lambda path: bz2.open(path, 'rb'),
+    '.xz': lambda path: lzma.open(path, 'rb'),
+    '.zst': lambda path: zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')),
+}
+
+FORMATS = ('.json', '.jsonl')
+
+
+class HashingWriter:
+    """Text stream that counts lines and hashes the uncompressed bytes it writes"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.rows = 0
+        self.bytes = 0
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self.raw.write(data)
+        self.sha256.update(data)
+        self.rows += data.count(b'\n')
+        self.bytes += len(data)
+
+    def flush(self):
+        self.raw.flush()
+
+
+def file_digest(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def integrity_check(path):
+    """SQLite's integrity_check result for the database file at ``path`` ('ok' if sound)"""
+    check = sqlite3.connect(path)
+    try:
+        return '\n'.join(row[0] for row in check.execute('PRAGMA integrity_check'))
+    finally:
+        check.close()
+
+
+def split_backup_name(filename):
+    """'pet.jsonl.gz' -> ('pet', '.jsonl', '.gz'); None if not a backup file"""
+    stem, compression = os.path.splitext(filename)
+    if compression not in DECOMPRESSORS:
+        stem, compression = filename, ''
+    stem, fmt = os.path.splitext(stem)
+    if fmt not in FORMATS:
+        return None
+    return stem, fmt, compression
+
+
+def is_backup_file(filename):
+    return filename != 'manifest.json' and split_backup_name(filename) is not None
+
+
+def model_for_file(filename, app_label='pet_adoption'):
+    """The model a '<model_name>.json[l]' backup file holds, or None"""
+    parts = split_backup_name(filename)
+    if parts is None:
+        return None
+    try:
+        return apps.get_app_config(app_label).get_model(parts[0])
+    except LookupError:
+        return None
+
+
+@contextmanager
+def open_backup(path):
+    """Open a (possibly compressed) backup file for reading as text"""
+    compression = split_backup_name(os.path.basename(path))[2]
+    if compression == '.zst' and zstandard is None:
+        raise ValueError(f'{path} is zstd-compressed; install the "zstandard" package to read it')
+    raw = DECOMPRESSORS[compression](path) if compression else open(path, 'rb')
+    with raw, io.TextIOWrapper(raw, encoding='utf-8') as f:
+        yield f
+
+
+def read_records(path):
+    """
+    Yield the serialized objects in a backup file.
+
+    ``.jsonl`` files are streamed a line at a time; ``.json`` arrays are
+    parsed once in full.
+    """
+    fmt = split_backup_name(os.path.basename(path))[1]
+    with open_backup(path) as f:
+        if fmt == '.json':
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def dependency_order(models):
+    """Sort ``models`` so every model comes after the models its foreign keys point to"""
+    models = list(models)
+    ordered = []
+    visiting = set()
+
+    def visit(model):
+        if model in ordered or model in visiting:
+            return
+        visiting.add(model)
+        for field in model._meta.concrete_fields:
+            related = field.related_model
+            if field.is_relation and related in models and related is not model:
+                visit(related)
+        visiting.discard(model)
+        ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return ordered
+
+
+# Incremental backups
+#
+# Every backup manifest records a watermark: the time its dump started. A
+# delta backup exports what changed since its parent's watermark, minus
+# WATERMARK_OVERLAP so a transaction that stamped updated_at before the
+# watermark but committed after it is not missed (reloading a row twice is
+# harmless, loads are upserts). Changed rows are found through:
+#
+# - ``updated_at`` on models that have it;
+# - ChangeLog 'save' entries for TRACKED_MODELS, which have no updated_at;
+# - nothing for SNAPSHOT_MODELS: these derived tables are small and are
+#   written in full to every delta.
+#
+# Deletions of any backed-up model are recorded as ChangeLog 'delete' entries.
+
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+TRACKED_MODELS = ('pet_adoption.Donation', 'pet_adoption.NewsletterSubscription')
+SNAPSHOT_MODELS = ('pet_adoption.DonationTotal', 'pet_adoption.DonationRollup')
+EXCLUDED_MODELS = ('pet_adoption.ChangeLog', 'pet_adoption.ImageUpload')
+
+
+def backup_models(app_label='pet_adoption'):
+    """Labels of the models a backup covers"""
+    return [
+        model._meta.label for model in apps.get_app_config(app_label).get_models()
+        if model._meta.label not in EXCLUDED_MODELS
+    ]
+
+
+def record_changes(model, pks, action):
+    ChangeLog.objects.bulk_create([
+        ChangeLog(model=model._meta.label, object_pk=str(pk), action=action)
+        for pk in pks
+    ])
+
+
+def changed_queryset(model, since):
+    """Rows of ``model`` saved at or after ``since``, or every row for snapshot models"""
+    queryset = model._default_manager.all()
+    if model._meta.label in SNAPSHOT_MODELS:
+        return queryset
+    if model._meta.label in TRACKED_MODELS:
+        saved = ChangeLog.objects.filter(
+            model=model._meta.label, action='save', changed_at__gte=since
+        ).values_list(Cast('object_pk', output_field=model._meta.pk.__class__()), flat=True)
+        return queryset.filter(pk__in=saved)
+    return queryset.filter(updated_at__gte=since)
+
+
+def deleted_pks(since, labels):
+    """{model label: [pk, ...]} for rows deleted at or after ``since``"""
+    deleted = {}
+    entries = ChangeLog.objects.filter(
+        action='delete', changed_at__gte=since, model__in=labels
+    ).values_list('model', 'object_pk')
+    for label, pk in entries:
+        deleted.setdefault(label, set()).add(apps.get_model(label)._meta.pk.to_python(pk))
+    return {label: sorted(pks) for label, pks in deleted.items()}
+
+
+def prune_changes(before):
+    """Drop ChangeLog entries no future delta will need"""
+    return ChangeLog.objects.filter(changed_at__lt=before).delete()[0]
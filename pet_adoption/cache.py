@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from . import metrics
+
+
+# Cache namespaces; every key in a namespace embeds its current generation,
+# so bumping the generation invalidates all of the namespace's entries at once.
+PETS = 'pets'
+
+STATS = ('hit', 'miss', 'evict')
+
+# Hit/miss/evict counters are counted in each process, which writes them to
+# its own file in METRICS_DIR/cache at most every METRICS_FLUSH_INTERVAL
+# seconds; get_stats sums the files of all workers. Counting in the shared
+# cache would add a write to every request, and FileBasedCache.incr is a
+# read-modify-write that drops concurrent increments.
+_stats = Counter()
+_stats_lock = threading.Lock()
+_stats_flushed = time.monotonic()
+
+
+def _stats_dir():
+    return os.path.join(settings.METRICS_DIR, 'cache')
+
+
+def _timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60 * 60)
+
+
+def get_generation(namespace):
+    key = f'generation:{namespace}'
+    generation = cache.get(key)
+    if generation is None:
+        # A time-based value never collides with a generation that was evicted.
+        generation = time.time_ns()
+        cache.add(key, generation, None)
+        generation = cache.get(key, generation)
+    return generation
+
+
+def invalidate(namespace):
+    """Drop every cached entry in ``namespace``"""
+    cache.set(f'generation:{namespace}', time.time_ns(), None)
+    record(namespace, 'evict')
+
+
+def record(namespace, stat):
+    with _stats_lock:
+        _stats[namespace, stat] += 1
+        due = time.monotonic() - _stats_flushed >= settings.METRICS_FLUSH_INTERVAL
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    global _stats_flushed
+    with _stats_lock:
+        snapshot = json.dumps([[namespace, stat, count] for (namespace, stat), count in _stats.items()])
+        _stats_flushed = time.monotonic()
+    metrics.write_worker_file(_stats_dir(), snapshot)
+
+
+def get_stats(namespace):
+    """Counters for ``namespace`` summed over all workers since the server started"""
+    flush_stats()
+    stats = dict.fromkeys(STATS, 0)
+    for entries in metrics.read_worker_files(_stats_dir()):
+        for entry_namespace, stat, count in entries:
+            if entry_namespace == namespace and stat in stats:
+                stats[stat] += count
+    lookups = stats['hit'] + stats['miss']
+    stats['hit_ratio'] = round(stats['hit'] / lookups, 4) if lookups else None
+    return stats
+
+
+def normalize_query(request):
+    """Query string with sorted keys and values, empty values and page=1 dropped"""
+    params = []
+    for key in sorted(request.query_params):
+        values = sorted(value for value in request.query_params.getlist(key) if value != '')
+        if key == 'page' and values == ['1']:
+            continue
+        params.extend((key, value) for value in values)
+    return '&'.join(f'{key}={value}' for key, value in params)
+
+
+def response_cache_key(namespace, request):
+    raw = (
+        f'{request.get_host()}|{request.path}|{normalize_query(request)}|'
+        f'{request.accepted_renderer.format}'
+    )
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f'response:{namespace}:{get_generation(namespace)}:{digest}'
+
+
+def cached_response(namespace):
+    """
+    Read-through cache for a viewset handler's serialized response data.
+
+    Permission checks still run before the handler; only successful
+    responses are stored, and the data is re-rendered for each hit so
+    content negotiation keeps working. Conditional GET validators are
+    stored with the data, so a hit can still answer 304.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            key = response_cache_key(namespace, request)
+            entry = cache.get(key)
+            if entry is not None:
+                record(namespace, 'hit')
+                if entry['validators']:
+                    self.set_validators(**entry['validators'])
+                return Response(entry['data'])
+
+            record(namespace, 'miss')
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                entry = {
+                    'data': response.data,
+                    'validators': getattr(self, 'conditional_validators', None),
+                }
+                cache.set(key, entry, _timeout())
+            return response
+        return wrapper
+    return decorator
+
+
+def cached_value(namespace, name, compute):
+    """Return ``compute()`` cached under ``name`` in ``namespace``"""
+    key = f'value:{namespace}:{get_generation(namespace)}:{name}'
+    value = cache.get(key)
+    if value is not None:
+        record(namespace, 'hit')
+        return value
+    record(namespace, 'miss')
+    value = compute()
+    cache.set(key, value, _timeout())
+    return value
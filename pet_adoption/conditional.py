@@ -0,0 +1,125 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.db.models.functions import Greatest
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.exceptions import APIException
+
+from .cache import normalize_query
+
+
+class NotModified(APIException):
+    """Raised to short-circuit a view once its validators match the request"""
+    status_code = 304
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def has_updated_at(model):
+    return any(field.name == 'updated_at' for field in model._meta.concrete_fields)
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for viewsets.
+
+    List responses get an ETag derived from ``Max('updated_at')`` and
+    ``Count('pk')`` of the filtered queryset plus the normalized query and
+    renderer, computed in one aggregate query before the page is fetched.
+    The page-number paginator reuses that count instead of running its own
+    COUNT. Keyset pages get no list ETag: it would bring back the
+    full-table COUNT that keyset pagination avoids.
+    Detail responses get an ETag and Last-Modified from the object's
+    ``updated_at``. A matching ``If-None-Match`` / ``If-Modified-Since``
+    returns 304 before any serialization happens. Models without
+    ``updated_at`` only get the Cache-Control header.
+
+    A viewset whose responses embed related rows lists their timestamps in
+    ``related_updated_at`` (``['pet__updated_at']``), so editing a related
+    row changes the validators too.
+    """
+    # Keyword arguments for patch_cache_control on successful GET responses
+    cache_control = {'private': True, 'no_cache': True}
+    related_updated_at = []
+
+    conditional_validators = None
+
+    def is_conditional(self):
+        return self.request.method in ('GET', 'HEAD')
+
+    def paginate_queryset(self, queryset):
+        paginator = self.paginator
+        use_keyset = getattr(paginator, 'use_keyset', None)
+        if use_keyset is not None and use_keyset(self.request):
+            return super().paginate_queryset(queryset)
+        if self.is_conditional() and has_updated_at(queryset.model):
+            stats = queryset.order_by().aggregate(
+                latest=Max(self.updated_at_expression()), total=Count('pk')
+            )
+            if hasattr(paginator, 'known_count'):
+                paginator.known_count = stats['total']
+            self.set_validators(etag=self.list_etag(stats))
+        return super().paginate_queryset(queryset)
+
+    def updated_at_expression(self):
+        if self.related_updated_at:
+            return Greatest('updated_at', *self.related_updated_at)
+        return 'updated_at'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        if self.related_updated_at and self.is_conditional() and lookup in self.kwargs:
+            queryset = queryset.annotate(etag_updated_at=self.updated_at_expression())
+        return queryset
+
+    def get_object(self):
+        obj = super().get_object()
+        if self.is_conditional() and has_updated_at(type(obj)):
+            timestamp = getattr(obj, 'etag_updated_at', obj.updated_at).timestamp()
+            etag = f'{obj.pk}-{timestamp}-{self.request.accepted_renderer.format}'
+            query = normalize_query(self.request)
+            if query:
+                # ?fields= and ?expand= change the representation
+                etag = f'{etag}-{hashlib.md5(query.encode("utf-8")).hexdigest()[:12]}'
+            self.set_validators(etag=quote_etag(etag), last_modified=int(timestamp))
+        return obj
+
+    def list_etag(self, stats):
+        latest = stats['latest'].timestamp() if stats['latest'] else 0
+        raw = (
+            f'{self.request.path}|{normalize_query(self.request)}|'
+            f'{self.request.accepted_renderer.format}|{latest}|{stats["total"]}'
+        )
+        return quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+    def set_validators(self, etag=None, last_modified=None):
+        """Record the validators and raise NotModified if the client's copy is current"""
+        self.conditional_validators = {'etag': etag, 'last_modified': last_modified}
+        response = get_conditional_response(
+            self.request._request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if not self.is_conditional() or response.status_code not in (200, 304):
+            return response
+
+        validators = self.conditional_validators or {}
+        if validators.get('etag') and not response.has_header('ETag'):
+            response['ETag'] = validators['etag']
+        if validators.get('last_modified') and not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(validators['last_modified'])
+        patch_cache_control(response, **self.cache_control)
+        patch_vary_headers(response, ['Accept', 'Cookie'])
+        return response
@@ -0,0 +1,250 @@
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Trunc, TruncDate, TruncHour
+from django.utils import timezone
+
+from .backups import record_changes
+from .models import Donation, DonationRollup, DonationTotal
+
+logger = logging.getLogger(__name__)
+
+# Donation has no currency field; every amount is recorded in this currency.
+DEFAULT_CURRENCY = 'USD'
+
+
+def contribution(payment_status, amount, created_at):
+    """(period, amount) a donation adds to the daily totals, or None"""
+    if payment_status != 'completed' or created_at is None:
+        return None
+    return timezone.localdate(created_at).isoformat(), Decimal(amount)
+
+
+def apply_delta(period, amount, count, currency=DEFAULT_CURRENCY):
+    """Add ``amount``/``count`` to the daily and overall totals for ``period``"""
+    with transaction.atomic():
+        for bucket in (period, DonationTotal.OVERALL):
+            DonationTotal.objects.get_or_create(period=bucket, currency=currency)
+            DonationTotal.objects.filter(period=bucket, currency=currency).update(
+                total_amount=F('total_amount') + amount,
+                donation_count=F('donation_count') + count,
+            )
+
+
+def apply_transition(old, new):
+    """Move a donation's contribution from ``old`` to ``new`` (either may be None)"""
+    if old == new:
+        return
+    if old is not None:
+        apply_delta(old[0], -old[1], -1)
+    if new is not None:
+        apply_delta(new[0], new[1], 1)
+
+
+def update_payment_status(queryset, payment_status):
+    """
+    Bulk-update ``payment_status`` and adjust the totals for rows that
+    enter or leave the completed state, in one transaction.
+    """
+    with transaction.atomic():
+        changed = queryset.exclude(payment_status=payment_status)
+        if payment_status == 'completed':
+            sign = 1
+            moving = changed
+        else:
+            sign = -1
+            moving = changed.filter(payment_status='completed')
+        buckets = (
+            moving.annotate(day=TruncDate('created_at'))
+            .values('day')
+            .annotate(amount=Sum('amount'), count=Count('pk'))
+            .order_by()
+        )
+        for bucket in buckets:
+            apply_delta(bucket['day'].isoformat(), sign * bucket['amount'], sign * bucket['count'])
+        mark_rollup_stale_for(moving)
+        schedule_rollup_refresh()
+        # queryset.update() sends no post_save, so log the change for delta backups
+        record_changes(Donation, changed.values_list('pk', flat=True), 'save')
+        return changed.update(payment_status=payment_status)
+
+
+def get_overall(currency=DEFAULT_CURRENCY):
+    total = DonationTotal.objects.filter(
+        period=DonationTotal.OVERALL, currency=currency
+    ).first()
+    if total is None:
+        return Decimal(0), 0
+    return total.total_amount, total.donation_count
+
+
+def compute_totals(currency=DEFAULT_CURRENCY):
+    """Recompute {period: (amount, count)} from the Donation table"""
+    totals = {}
+    overall_amount, overall_count = Decimal(0), 0
+    rows = (
+        Donation.objects.filter(payment_status='completed')
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(amount=Sum('amount'), count=Count('pk'))
+        .order_by()
+    )
+    for row in rows:
+        totals[row['day'].isoformat()] = (row['amount'], row['count'])
+        overall_amount += row['amount']
+        overall_count += row['count']
+    totals[DonationTotal.OVERALL] = (overall_amount, overall_count)
+    return totals
+
+
+def stored_totals(currency=DEFAULT_CURRENCY):
+    return {
+        total.period: (total.total_amount, total.donation_count)
+        for total in DonationTotal.objects.filter(currency=currency)
+    }
+
+
+def rebuild_totals(currency=DEFAULT_CURRENCY):
+    """Replace the stored totals with a fresh recomputation"""
+    with transaction.atomic():
+        DonationTotal.objects.filter(currency=currency).delete()
+        DonationTotal.objects.bulk_create([
+            DonationTotal(period=period, currency=currency,
+                          total_amount=amount, donation_count=count)
+            for period, (amount, count) in compute_totals(currency).items()
+        ])
+
+
+# Hourly rollup
+#
+# DonationRollup holds completed donation totals per hour. The watermark is
+# the latest fully rolled-up hour: a refresh re-aggregates every hour from
+# the watermark on, plus older hours flagged stale because one of their
+# donations changed after being rolled up. Writes that change a completed
+# donation schedule a refresh for after they commit; the
+# refresh_donation_rollup command catches up on any that were skipped.
+
+TIMESERIES_BUCKETS = ('hour', 'day', 'week', 'month')
+
+
+def truncate_hour(value):
+    return timezone.localtime(value).replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_watermark():
+    return DonationRollup.objects.filter(stale=False).aggregate(latest=Max('bucket'))['latest']
+
+
+def mark_rollup_stale(created_at, is_custom, is_anonymous):
+    """Flag the hour a donation was created in for re-aggregation"""
+    hour = truncate_hour(created_at)
+    if not DonationRollup.objects.filter(bucket=hour).update(stale=True):
+        DonationRollup.objects.get_or_create(
+            bucket=hour, is_custom=is_custom, is_anonymous=is_anonymous,
+            defaults={'stale': True},
+        )
+
+
+def mark_rollup_stale_for(queryset):
+    hours = (
+        queryset.annotate(hour=TruncHour('created_at'))
+        .values_list('hour', 'is_custom', 'is_anonymous')
+        .distinct()
+        .order_by()
+    )
+    for hour, is_custom, is_anonymous in hours:
+        mark_rollup_stale(hour, is_custom, is_anonymous)
+
+
+def refresh_rollup(full=False):
+    """Re-aggregate hours at or after the watermark and any stale hours"""
+    with transaction.atomic():
+        if full:
+            DonationRollup.objects.all().delete()
+        watermark = rollup_watermark()
+        if watermark is None:
+            # Nothing rolled up yet (or only stale placeholders): rebuild all
+            DonationRollup.objects.all().delete()
+            donations = Q()
+        else:
+            rows = Q(bucket__gte=watermark)
+            donations = Q(created_at__gte=watermark)
+            stale_hours = (
+                DonationRollup.objects.filter(stale=True, bucket__lt=watermark)
+                .values_list('bucket', flat=True).distinct()
+            )
+            for hour in stale_hours:
+                rows |= Q(bucket=hour)
+                donations |= Q(created_at__gte=hour, created_at__lt=hour + timedelta(hours=1))
+            DonationRollup.objects.filter(rows).delete()
+
+        buckets = (
+            Donation.objects.filter(donations, payment_status='completed')
+            .annotate(hour=TruncHour('created_at'))
+            .values('hour', 'is_custom', 'is_anonymous')
+            .annotate(amount=Sum('amount'), count=Count('pk'))
+            .order_by()
+        )
+        created = DonationRollup.objects.bulk_create([
+            DonationRollup(
+                bucket=bucket['hour'], is_custom=bucket['is_custom'],
+                is_anonymous=bucket['is_anonymous'],
+                total_amount=bucket['amount'], donation_count=bucket['count'],
+            )
+            for bucket in buckets
+        ])
+        return len(created)
+
+
+def schedule_rollup_refresh():
+    """Refresh the rollup once the current transaction commits (once per transaction)"""
+    if any(func is refresh_rollup_after_commit for _, func, _ in connection.run_on_commit):
+        return
+    transaction.on_commit(refresh_rollup_after_commit)
+
+
+def refresh_rollup_after_commit():
+    try:
+        refresh_rollup()
+    except OperationalError as e:
+        if 'locked' not in str(e):
+            raise
+        # The change is committed and its hour stays due; the next refresh
+        # (or the refresh_donation_rollup command) rolls it up
+        logger.warning('Skipped donation rollup refresh, database is locked: %s', e)
+
+
+def timeseries(bucket, start, end):
+    """
+    Completed donation totals per ``bucket`` between ``start`` and ``end``,
+    merged from the hourly rollup and broken down by is_custom/is_anonymous.
+    """
+    rows = (
+        DonationRollup.objects.filter(bucket__gte=truncate_hour(start), bucket__lt=end, donation_count__gt=0)
+        .annotate(period=Trunc('bucket', bucket))
+        .values('period', 'is_custom', 'is_anonymous')
+        .annotate(amount=Sum('total_amount'), count=Sum('donation_count'))
+        .order_by('period', 'is_custom', 'is_anonymous')
+    )
+    periods = []
+    for row in rows:
+        if not periods or periods[-1]['period'] != row['period']:
+            periods.append({
+                'period': row['period'],
+                'total_amount': Decimal(0),
+                'donation_count': 0,
+                'groups': [],
+            })
+        current = periods[-1]
+        current['total_amount'] += row['amount']
+        current['donation_count'] += row['count']
+        current['groups'].append({
+            'is_custom': row['is_custom'],
+            'is_anonymous': row['is_anonymous'],
+            'total_amount': row['amount'],
+            'donation_count': row['count'],
+        })
+    return periods
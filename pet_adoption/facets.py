@@ -0,0 +1,52 @@
+from django.db import models
+from django.db.models import Count, Q
+
+
+def facet_values(model, name):
+    """Every value a facet field can take: its choices, or True/False"""
+    field = model._meta.get_field(name)
+    if field.choices:
+        return [value for value, _ in field.flatchoices]
+    if isinstance(field, models.BooleanField):
+        return [True, False]
+    raise ValueError(f'{model.__name__}.{name} has no fixed set of values to count')
+
+
+def facet_key(value):
+    """JSON object key for a value, spelled like the query parameter that filters on it"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def _count(conditions):
+    condition = Q(**conditions)
+    return Count('pk', filter=condition) if conditions else Count('pk')
+
+
+def facet_counts(queryset, fields, applied):
+    """
+    Count the rows of ``queryset`` per value of each of ``fields``, in one
+    aggregate query of conditional counts.
+
+    ``applied`` maps field names to the filter values currently selected.
+    Each field's counts apply every other selected filter but not its own,
+    so every option shows how many rows choosing it would return; ``total``
+    applies them all. Returns ``{'total': n, field: {value: count}}``.
+    """
+    aggregates = {'total': _count(applied)}
+    labels = {}
+    for field_index, name in enumerate(fields):
+        others = {other: value for other, value in applied.items() if other != name}
+        for value_index, value in enumerate(facet_values(queryset.model, name)):
+            alias = f'facet_{field_index}_{value_index}'
+            aggregates[alias] = _count({**others, name: value})
+            labels[alias] = (name, facet_key(value))
+
+    result = queryset.order_by().aggregate(**aggregates)
+    counts = {'total': result['total']}
+    for name in fields:
+        counts[name] = {}
+    for alias, (name, key) in labels.items():
+        counts[name][key] = result[alias]
+    return counts
@@ -0,0 +1,47 @@
+from .conditional import has_updated_at
+from .serializers import RowSerializerMixin, SparseFieldsetMixin
+
+
+def parse_names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class FieldSelectionMixin:
+    """
+    ``?fields=`` and ``?expand=`` on GET requests.
+
+    The names are passed on to SparseFieldsetMixin serializers. Lists served
+    by ValuesListMixin then fetch only the selected columns; detail requests
+    load them with ``only()`` and join a related model only when one of its
+    fields is selected or expanded.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method in ('GET', 'HEAD') and issubclass(self.get_serializer_class(), SparseFieldsetMixin):
+            params = self.request.query_params
+            if params.get(self.fields_query_param):
+                kwargs.setdefault('fields', parse_names(params[self.fields_query_param]))
+            if params.get(self.expand_query_param):
+                kwargs.setdefault('expand', parse_names(params[self.expand_query_param]))
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            serializer = self.get_serializer()
+            if isinstance(serializer, RowSerializerMixin):
+                queryset = self.select_columns(queryset, serializer.row_columns())
+        return queryset
+
+    def select_columns(self, queryset, columns):
+        model = queryset.model
+        columns = [model._meta.pk.name, *columns]
+        if has_updated_at(model):
+            # Read by ConditionalGetMixin for the ETag and Last-Modified
+            columns.append('updated_at')
+        relations = {column.rpartition('__')[0] for column in columns if '__' in column}
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*columns)
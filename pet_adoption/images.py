@@ -0,0 +1,112 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import cache
+from .models import Pet
+from .storage import is_content_addressed, pet_image_storage
+
+
+logger = logging.getLogger(__name__)
+
+# Widths of the resized copies; a copy is never wider than the original
+VARIANT_WIDTHS = (320, 640, 1024)
+
+FORMATS = {
+    'webp': ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+
+
+def variant_name(name, width, image_format):
+    """'images/pets/rex.png' -> 'images/pets/rex.320w.webp'"""
+    stem = os.path.splitext(name)[0]
+    return f'{stem}.{width}w.{FORMATS[image_format][0]}'
+
+
+def target_widths(original_width):
+    widths = [width for width in VARIANT_WIDTHS if width < original_width]
+    return widths or [original_width]
+
+
+def render_variants(name, overwrite=False):
+    """
+    Write resized WebP and JPEG copies of the stored image ``name``; returns
+    the sizes map. Copies of a content-addressed image are named after its
+    hash too, so existing ones are reused unless ``overwrite`` is set.
+    """
+    with pet_image_storage.open(name, 'rb') as f:
+        original = ImageOps.exif_transpose(Image.open(f))
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    content_addressed = is_content_addressed(name)
+    sizes = {}
+    for width in target_widths(original.width):
+        height = max(1, round(original.height * width / original.width))
+        resized = original.resize((width, height), Image.Resampling.LANCZOS)
+        sizes[f'{width}w'] = {}
+        for image_format, (_, pil_format, params) in FORMATS.items():
+            target = variant_name(name, width, image_format)
+            if content_addressed and not overwrite and pet_image_storage.exists(target):
+                sizes[f'{width}w'][image_format] = target
+                continue
+            image = resized.convert('RGB') if pil_format == 'JPEG' else resized
+            buffer = BytesIO()
+            image.save(buffer, pil_format, **params)
+            if content_addressed:
+                saved = pet_image_storage.save_derived(target, ContentFile(buffer.getvalue()))
+            else:
+                if default_storage.exists(target):
+                    default_storage.delete(target)
+                saved = default_storage.save(target, ContentFile(buffer.getvalue()))
+            sizes[f'{width}w'][image_format] = saved
+    return sizes
+
+
+def generate_variants(pet_id, name, overwrite=False):
+    """
+    Render the copies of ``name`` for pet ``pet_id`` and record them, unless
+    the pet's image changed in the meantime. Returns True if recorded.
+    """
+    try:
+        sizes = render_variants(name, overwrite)
+        updated = Pet.objects.filter(pk=pet_id, image=name).update(
+            image_variants={'source': name, 'sizes': sizes},
+            updated_at=timezone.now(),
+        )
+    finally:
+        # Runs on pool threads, which would otherwise each keep a connection open
+        connection.close()
+    if updated:
+        cache.invalidate(cache.PETS)
+    return bool(updated)
+
+
+def _run(pet_id, name):
+    try:
+        generate_variants(pet_id, name)
+    except Exception:
+        logger.exception('Could not generate image variants for pet %s (%s)', pet_id, name)
+
+
+def schedule_variants(pet):
+    """Render the pet's image copies on the worker pool, off the request thread"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_WORKERS', 2),
+            thread_name_prefix='pet-images',
+        )
+    _executor.submit(_run, pet.pk, pet.image.name)
@@ -0,0 +1,35 @@
+from rest_framework.response import Response
+
+from .serializers import RowSerializerMixin
+
+
+class ValuesListMixin:
+    """
+    Serve ``list`` from ``QuerySet.values()`` when the list serializer is a
+    RowSerializerMixin: a page fetches only the serialized columns and no
+    model instances are built. The ordering columns and primary key are
+    fetched too, so keyset pagination can build its cursors from the rows.
+    The output is the same as serializing model instances.
+    """
+    use_values_list = True
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        if not (self.use_values_list and isinstance(serializer, RowSerializerMixin)):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*self.get_row_columns(queryset, serializer))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_rows(page))
+        return Response(serializer.to_rows(queryset))
+
+    def get_row_columns(self, queryset, serializer):
+        columns = serializer.row_columns()
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        for name in [*ordering, 'pk']:
+            name = name.lstrip('-')
+            if name not in columns:
+                columns.append(name)
+        return columns
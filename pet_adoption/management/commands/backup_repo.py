@@ -0,0 +1,137 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pet_adoption.backup_store import BackupRepository, RepositoryError, retained
+
+
+class Command(BaseCommand):
+    help = (
+        'Manage the deduplicated backup repository: store a backup directory as a '
+        'snapshot, list, verify or restore snapshots, and prune them by retention policy'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action',
+            choices=['store', 'list', 'verify', 'restore', 'prune'],
+            help='What to do'
+        )
+        parser.add_argument(
+            '--repo',
+            type=str,
+            default='/app/backups/repo',
+            help='Repository directory'
+        )
+        parser.add_argument(
+            '--source',
+            type=str,
+            default='/app/backups/current',
+            help='Backup directory to store (store)'
+        )
+        parser.add_argument(
+            '--snapshot',
+            type=str,
+            default=None,
+            help='Snapshot id (verify, restore); "latest" for the newest. verify checks all by default'
+        )
+        parser.add_argument(
+            '--target',
+            type=str,
+            default=None,
+            help='Directory to restore the snapshot into (restore)'
+        )
+        parser.add_argument('--keep-daily', type=int, default=7, help='Daily snapshots to keep (prune)')
+        parser.add_argument('--keep-weekly', type=int, default=4, help='Weekly snapshots to keep (prune)')
+        parser.add_argument('--keep-monthly', type=int, default=6, help='Monthly snapshots to keep (prune)')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what prune would delete without deleting anything'
+        )
+
+    def handle(self, *args, **options):
+        repo = BackupRepository(options['repo'])
+        try:
+            getattr(self, f'handle_{options["action"]}')(repo, options)
+        except RepositoryError as e:
+            raise CommandError(str(e))
+
+    def get_snapshot(self, repo, snapshot_id):
+        if snapshot_id != 'latest':
+            return repo.load_snapshot(snapshot_id)
+        snapshots = repo.snapshots()
+        if not snapshots:
+            raise CommandError(f'No snapshots in {repo.path}')
+        return snapshots[-1]
+
+    def handle_store(self, repo, options):
+        if not os.path.isdir(options['source']):
+            raise CommandError(f'Backup directory {options["source"]} does not exist.')
+        with repo.lock():
+            snapshot, stats = repo.store(options['source'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored snapshot {snapshot["id"]}: {stats["files"]} files, {stats["bytes"]:,} bytes '
+            f'in {stats["chunks"]} chunks, {stats["new_chunks"]} new ({stats["new_bytes"]:,} bytes written)'
+        ))
+
+    def handle_list(self, repo, options):
+        snapshots = repo.snapshots()
+        if not snapshots:
+            self.stdout.write(self.style.WARNING(f'No snapshots in {repo.path}'))
+            return
+        for snapshot in snapshots:
+            size = sum(entry['size'] for entry in snapshot['files'].values())
+            self.stdout.write(
+                f'{snapshot["id"]}  {snapshot["created_at"]}  '
+                f'{len(snapshot["files"]):>3} files  {size:>14,} bytes'
+            )
+
+    def handle_verify(self, repo, options):
+        if options['snapshot']:
+            snapshots = [self.get_snapshot(repo, options['snapshot'])]
+        else:
+            snapshots = repo.snapshots()
+        failures = 0
+        for snapshot in snapshots:
+            problems = repo.verify(snapshot)
+            if not problems:
+                self.stdout.write(f'{snapshot["id"]}  ok')
+                continue
+            failures += 1
+            self.stdout.write(self.style.ERROR(f'{snapshot["id"]}  {len(problems)} problem(s)'))
+            for problem in problems:
+                self.stdout.write(f'  {problem}')
+        if failures:
+            raise CommandError(f'{failures} snapshot(s) failed verification')
+        self.stdout.write(self.style.SUCCESS(f'\nAll {len(snapshots)} snapshot(s) verified'))
+
+    def handle_restore(self, repo, options):
+        if not options['snapshot'] or not options['target']:
+            raise CommandError('restore needs --snapshot and --target.')
+        snapshot = self.get_snapshot(repo, options['snapshot'])
+        repo.restore(snapshot, options['target'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Restored snapshot {snapshot["id"]} ({len(snapshot["files"])} files) to {options["target"]}'
+        ))
+
+    def handle_prune(self, repo, options):
+        with repo.lock():
+            snapshots = repo.snapshots()
+            keep = retained(
+                snapshots, options['keep_daily'], options['keep_weekly'], options['keep_monthly']
+            )
+            forget = [snapshot['id'] for snapshot in snapshots if snapshot['id'] not in keep]
+            for snapshot_id in forget:
+                self.stdout.write(f'Removing snapshot {snapshot_id}')
+            if options['dry_run']:
+                self.stdout.write(self.style.WARNING(
+                    f'Dry run: would keep {len(keep)} snapshot(s) and remove {len(forget)}'
+                ))
+                return
+            repo.forget(forget)
+            chunks, freed = repo.collect_garbage()
+        self.stdout.write(self.style.SUCCESS(
+            f'Kept {len(keep)} snapshot(s), removed {len(forget)}; '
+            f'freed {chunks} chunks ({freed:,} bytes)'
+        ))
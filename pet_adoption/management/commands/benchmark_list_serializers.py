@@ -0,0 +1,122 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIRequestFactory
+
+from pet_adoption.models import Pet
+from pet_adoption.seeding import seed_database
+from pet_adoption.views import (
+    AdoptionViewSet, ContactViewSet, DonationViewSet, NewsletterSubscriptionViewSet, PetViewSet, VolunteerViewSet
+)
+
+
+# (name, viewset, query strings checked for identical output)
+ROUTES = [
+    ('pets', PetViewSet, ['', 'ordering=name', 'search=friendly', 'pagination=cursor', 'pet_type=dog', 'ordering=-name&page=2']),
+    ('adoptions', AdoptionViewSet, ['', 'status=pending', 'ordering=status', 'pagination=cursor']),
+    ('volunteers', VolunteerViewSet, ['', 'search=First1', 'ordering=-applied_at', 'pagination=cursor']),
+    ('donations', DonationViewSet, ['', 'ordering=amount', 'pagination=cursor']),
+    ('contacts', ContactViewSet, ['', 'search=Contact', 'is_read=true']),
+    ('newsletter', NewsletterSubscriptionViewSet, ['', 'search=example', 'pagination=cursor']),
+]
+
+
+def add_image_variants(every=2):
+    """Give every ``every``-th pet an image with resized copies, so URL building is measured"""
+    for pet_id in Pet.objects.values_list('id', flat=True)[::every]:
+        stem = f'images/pets/{pet_id % 256:02x}/{pet_id:064x}'
+        Pet.objects.filter(pk=pet_id).update(
+            image=f'{stem}.jpg',
+            image_variants={
+                'source': f'{stem}.jpg',
+                'sizes': {
+                    f'{width}w': {'webp': f'{stem}.{width}w.webp', 'jpeg': f'{stem}.{width}w.jpg'}
+                    for width in (320, 640, 1024)
+                },
+            },
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare list endpoint throughput of the values() row serializers with '
+        'the model instance serializers on a throwaway seeded database, and '
+        'check both produce byte-identical responses'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=2000,
+            help='Synthetic rows to seed per model'
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=100,
+            help='Page size of the measured requests'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Requests per route and serializer mode'
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        # Keep the run isolated from the shared response cache
+        cache_settings = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        })
+        try:
+            self.stdout.write(f'Seeding {options["rows"]} rows per model...')
+            seed_database(options['rows'])
+            add_image_variants()
+            with cache_settings:
+                self.check_identical()
+                self.measure(options['page_size'], options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def get(self, viewset, url, use_values_list):
+        # Measure serialization, not the response cache
+        cache.clear()
+        view = viewset.as_view({'get': 'list'}, use_values_list=use_values_list)
+        response = view(APIRequestFactory().get(url))
+        response.render()
+        if response.status_code != 200:
+            raise CommandError(f'{url} returned HTTP {response.status_code}')
+        return response.content
+
+    def check_identical(self):
+        for name, viewset, queries in ROUTES:
+            for query in queries:
+                for page_size in (10, 100):
+                    url = f'/api/v1/{name}/?page_size={page_size}&{query}'
+                    if self.get(viewset, url, True) != self.get(viewset, url, False):
+                        raise CommandError(f'{url}: values() output differs from the model serializer')
+        self.stdout.write('Responses are byte-identical in both modes\n')
+
+    def measure(self, page_size, iterations):
+        self.stdout.write(
+            f'{"route":<12} {"instances rows/s":>17} {"values rows/s":>14} {"speedup":>8}'
+        )
+        for name, viewset, _ in ROUTES:
+            url = f'/api/v1/{name}/?page_size={page_size}'
+            rates = []
+            for use_values_list in (False, True):
+                self.get(viewset, url, use_values_list)
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    self.get(viewset, url, use_values_list)
+                rates.append(page_size * iterations / (time.perf_counter() - start))
+            self.stdout.write(
+                f'{name:<12} {rates[0]:>17,.0f} {rates[1]:>14,.0f} {rates[1] / rates[0]:>7.2f}x'
+            )
@@ -0,0 +1,152 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+PROFILES = ('basic', 'production')
+
+
+def connect(path, profile):
+    """Open a connection configured like Django's for ``profile``"""
+    # Python's sqlite3 default busy timeout, which Django also uses
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    if profile == 'production':
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+
+def create_database(path, profile, rows):
+    conn = connect(path, profile)
+    conn.executescript('''
+        CREATE TABLE pet (id INTEGER PRIMARY KEY, name TEXT, description TEXT, status TEXT);
+        CREATE TABLE contact (id INTEGER PRIMARY KEY, name TEXT, message TEXT, created_at REAL);
+    ''')
+    conn.executemany(
+        'INSERT INTO pet (name, description, status) VALUES (?, ?, ?)',
+        [(f'Pet {i}', 'friendly ' * 40, 'available') for i in range(rows)]
+    )
+    conn.close()
+
+
+def run_worker(path, profile, seconds, write_ratio, rows, seed):
+    """
+    Mix page reads with form-style writes until ``seconds`` elapse. A write
+    reads before inserting, like a save() whose signals query first, which is
+    what makes deferred transactions fail under contention.
+    """
+    rng = random.Random(seed)
+    conn = connect(path, profile)
+    begin = 'BEGIN IMMEDIATE' if profile == 'production' else 'BEGIN'
+    stats = {'reads': [], 'writes': [], 'errors': 0}
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if rng.random() < write_ratio:
+                conn.execute(begin)
+                try:
+                    conn.execute('SELECT COUNT(*) FROM contact').fetchone()
+                    conn.execute(
+                        'INSERT INTO contact (name, message, created_at) VALUES (?, ?, ?)',
+                        ('Visitor', 'hello ' * 50, time.time())
+                    )
+                    conn.execute('COMMIT')
+                except sqlite3.Error:
+                    conn.execute('ROLLBACK')
+                    raise
+                stats['writes'].append(time.perf_counter() - start)
+            else:
+                conn.execute(
+                    'SELECT id, name, description FROM pet WHERE status = ? ORDER BY id LIMIT 20 OFFSET ?',
+                    ('available', rng.randrange(rows))
+                ).fetchall()
+                stats['reads'].append(time.perf_counter() - start)
+        except sqlite3.OperationalError:
+            stats['errors'] += 1
+    conn.close()
+    return stats
+
+
+def p95(timings):
+    if not timings:
+        return 0.0
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark concurrent SQLite read/write throughput with the basic and '
+        'production connection profiles, on a scratch database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Concurrent processes, like gunicorn workers'
+        )
+        parser.add_argument(
+            '--seconds',
+            type=float,
+            default=5.0,
+            help='Duration of each profile run'
+        )
+        parser.add_argument(
+            '--write-ratio',
+            type=float,
+            default=0.2,
+            help='Fraction of operations that are writes'
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=2000,
+            help='Pet rows in the scratch database'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{options["workers"]} workers, {options["seconds"]}s per profile, '
+            f'{options["write_ratio"]:.0%} writes\n'
+        )
+        self.stdout.write(
+            f'{"profile":<12} {"reads/s":>9} {"writes/s":>9} {"errors":>7} '
+            f'{"p95 read":>10} {"p95 write":>10}'
+        )
+        for profile in PROFILES:
+            result = self.run_profile(profile, options)
+            self.stdout.write(
+                f'{profile:<12} {result["reads"] / options["seconds"]:>9.0f} '
+                f'{result["writes"] / options["seconds"]:>9.0f} {result["errors"]:>7} '
+                f'{result["p95_read"]:>8.1f}ms {result["p95_write"]:>8.1f}ms'
+            )
+
+    def run_profile(self, profile, options):
+        with tempfile.TemporaryDirectory() as scratch:
+            path = os.path.join(scratch, 'benchmark.sqlite3')
+            create_database(path, profile, options['rows'])
+            args = [
+                (path, profile, options['seconds'], options['write_ratio'], options['rows'], seed)
+                for seed in range(options['workers'])
+            ]
+            with multiprocessing.Pool(options['workers']) as pool:
+                results = pool.starmap(run_worker, args)
+
+        reads = [t for result in results for t in result['reads']]
+        writes = [t for result in results for t in result['writes']]
+        return {
+            'reads': len(reads),
+            'writes': len(writes),
+            'errors': sum(result['errors'] for result in results),
+            'p95_read': p95(reads),
+            'p95_write': p95(writes),
+        }
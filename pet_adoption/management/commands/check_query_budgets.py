@@ -0,0 +1,183 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+)
+from django.urls import reverse
+
+from pet_adoption.api_urls import router
+from pet_adoption.seeding import seed_database
+
+
+DEFAULT_BUDGETS = os.path.join(settings.BASE_DIR, 'pet_adoption', 'query_budgets.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Check every API route against the SQL query count and p95 latency '
+        'budgets in query_budgets.json, using a throwaway seeded database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budgets',
+            type=str,
+            default=DEFAULT_BUDGETS,
+            help='Path to the budgets JSON file'
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=500,
+            help='Synthetic rows to seed per model'
+        )
+        parser.add_argument(
+            '--page-sizes',
+            type=str,
+            default='10,100',
+            help='Page sizes every list route is checked with (comma-separated)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Requests per route and page size used for the p95 latency'
+        )
+        parser.add_argument(
+            '--write',
+            action='store_true',
+            help='Record the measured query counts as the new budgets instead of checking'
+        )
+
+    def handle(self, *args, **options):
+        budgets = self.load_budgets(options['budgets'])
+        page_sizes = [int(size) for size in options['page_sizes'].split(',')]
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        # Keep the run isolated from the shared response cache
+        cache_settings = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        })
+        try:
+            self.stdout.write(f'Seeding {options["rows"]} rows per model...')
+            seed_database(options['rows'])
+            with cache_settings:
+                results = self.measure(page_sizes, options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['write']:
+            self.write_budgets(options['budgets'], budgets, results)
+            return
+
+        failures = self.check_budgets(budgets, results)
+        if failures:
+            raise CommandError(f'{failures} route(s) exceeded their budget')
+        self.stdout.write(self.style.SUCCESS(f'\nAll {len(results)} routes within budget'))
+
+    def load_budgets(self, path):
+        if not os.path.exists(path):
+            return {'default': {'max_queries': 5, 'p95_ms': 250}, 'routes': {}}
+        with open(path) as f:
+            return json.load(f)
+
+    def get_routes(self):
+        """Yield (url name, is detail, url) for every GET route on the API router"""
+        for prefix, viewset, basename in router.registry:
+            model = viewset.queryset.model
+            obj = model.objects.order_by('pk').first()
+            for route in router.get_routes(viewset):
+                # Router routes list every standard action; skip those the viewset lacks
+                if 'get' not in route.mapping or not hasattr(viewset, route.mapping['get']):
+                    continue
+                name = route.name.format(basename=basename)
+                kwargs = {}
+                if route.detail:
+                    if obj is None:
+                        continue
+                    kwargs = {'pk': obj.pk}
+                yield name, route.detail, reverse(f'pet_adoption:{name}', kwargs=kwargs)
+
+    def measure(self, page_sizes, iterations):
+        """Return {url name: {'queries': max count, 'p95_ms': worst p95, 'sql': [...]}}"""
+        # Routes are measured anonymously; only those that refuse anonymous
+        # requests get the staff session, whose lookups count against them.
+        anonymous = Client()
+        staff = Client()
+        staff.force_login(get_user_model().objects.create_superuser(
+            'budget-check', 'budget-check@example.com', None
+        ))
+        results = {}
+        for name, detail, url in self.get_routes():
+            urls = [url] if detail else [f'{url}?page_size={size}' for size in page_sizes]
+            result = {'queries': 0, 'p95_ms': 0.0, 'sql': [], 'url': url}
+            client = anonymous
+            for target in urls:
+                with CaptureQueriesContext(connection) as captured:
+                    response = client.get(target)
+                if response.status_code in (401, 403) and client is anonymous:
+                    client = staff
+                    with CaptureQueriesContext(connection) as captured:
+                        response = client.get(target)
+                if response.status_code != 200:
+                    raise CommandError(f'{target} returned HTTP {response.status_code}')
+                if len(captured) > result['queries']:
+                    result.update(queries=len(captured), url=target,
+                                  sql=[query['sql'] for query in captured.captured_queries])
+
+                timings = []
+                for _ in range(iterations):
+                    # Time the query and serialization path, not response cache hits
+                    cache.clear()
+                    start = time.perf_counter()
+                    client.get(target)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    reset_queries()
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                result['p95_ms'] = max(result['p95_ms'], p95)
+            results[name] = result
+        return results
+
+    def check_budgets(self, budgets, results):
+        failures = 0
+        default = budgets.get('default', {})
+        for name, result in sorted(results.items()):
+            budget = {**default, **budgets.get('routes', {}).get(name, {})}
+            over_queries = result['queries'] > budget.get('max_queries', float('inf'))
+            over_latency = result['p95_ms'] > budget.get('p95_ms', float('inf'))
+            line = f'{name:<32} {result["queries"]:>3} queries  p95 {result["p95_ms"]:7.1f} ms'
+            if not (over_queries or over_latency):
+                self.stdout.write(f'{line}  ok')
+                continue
+
+            failures += 1
+            self.stdout.write(self.style.ERROR(
+                f'{line}  over budget '
+                f'({budget.get("max_queries")} queries, {budget.get("p95_ms")} ms)'
+            ))
+            if over_queries:
+                self.stdout.write(f'  SQL issued by {result["url"]}:')
+                for sql in result['sql']:
+                    self.stdout.write(f'    {sql}')
+        return failures
+
+    def write_budgets(self, path, budgets, results):
+        routes = budgets.setdefault('routes', {})
+        for name, result in sorted(results.items()):
+            routes.setdefault(name, {})['max_queries'] = result['queries']
+        budgets['routes'] = dict(sorted(routes.items()))
+        with open(path, 'w') as f:
+            json.dump(budgets, f, indent=2)
+            f.write('\n')
+        self.stdout.write(self.style.SUCCESS(f'Wrote budgets for {len(results)} routes to {path}'))
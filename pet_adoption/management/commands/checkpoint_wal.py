@@ -0,0 +1,45 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = (
+        'Checkpoint the SQLite write-ahead log into the main database file, so the '
+        'WAL does not grow without bound between automatic checkpoints'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            choices=['passive', 'full', 'restart', 'truncate'],
+            default='truncate',
+            help='SQLite checkpoint mode; truncate also shrinks the WAL file to zero bytes'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('checkpoint_wal only supports the sqlite3 database backend.')
+
+        wal_file = f'{connection.settings_dict["NAME"]}-wal'
+        before = os.path.getsize(wal_file) if os.path.exists(wal_file) else 0
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            if cursor.fetchone()[0] != 'wal':
+                self.stdout.write(self.style.WARNING('Database is not in WAL mode; nothing to checkpoint.'))
+                return
+            cursor.execute(f'PRAGMA wal_checkpoint({options["mode"].upper()})')
+            busy, log_frames, checkpointed = cursor.fetchone()
+
+        after = os.path.getsize(wal_file) if os.path.exists(wal_file) else 0
+        message = (
+            f'Checkpointed {checkpointed} of {log_frames} WAL frames; '
+            f'WAL {before:,} -> {after:,} bytes'
+        )
+        if busy:
+            # Readers or a writer held the database; the rest is picked up next time
+            self.stdout.write(self.style.WARNING(f'{message} (incomplete, database busy)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -1,8 +1,51 @@
 import json
+import multiprocessing
 import os
-from django.core.management.base import BaseCommand
-from django.core.management import call_command
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 from django.apps import apps
+from django.core import serializers
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from pet_adoption.backups import (
+    COMPRESSORS, SNAPSHOT_MODELS, WATERMARK_OVERLAP, HashingWriter, backup_models,
+    changed_queryset, deleted_pks, file_digest, prune_changes, zstandard
+)
+
+
+def stream_model(model_label, output_dir, compression, chunk_size, since=None):
+    """
+    Write one model as newline-delimited JSON, one object per line.
+
+    Rows are read with a chunked iterator so memory stays constant
+    regardless of table size. With ``since``, only rows changed after it
+    are written. Runs in a worker process when dumping in parallel, so it
+    only takes and returns plain values.
+    """
+    model = apps.get_model(model_label)
+    suffix, opener = COMPRESSORS[compression]
+    filename = f"{model._meta.model_name}.jsonl{suffix}"
+
+    with opener(os.path.join(output_dir, filename)) as raw:
+        writer = HashingWriter(raw)
+        queryset = model._default_manager.all() if since is None else changed_queryset(model, since)
+        queryset = queryset.order_by(model._meta.pk.name)
+        serializers.serialize(
+            'jsonl', queryset.iterator(chunk_size=chunk_size), stream=writer
+        )
+    connections.close_all()
+    return {
+        'file': filename,
+        'rows': writer.rows,
+        'bytes': writer.bytes,
+        'sha256': writer.sha256.hexdigest(),
+        # 'full' files replace the table on restore, 'changes' files are upserted
+        'mode': 'changes' if since is not None and model_label not in SNAPSHOT_MODELS else 'full',
+    }
 
 
 class Command(BaseCommand):
@@ -21,41 +64,131 @@ class Command(BaseCommand):
             default=None,
             help='Specific models to dump (comma-separated, e.g., "pet_adoption.Pet,pet_adoption.Adoption")'
         )
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            help='Stream each model to newline-delimited JSON (<model>.jsonl) in constant memory'
+        )
+        parser.add_argument(
+            '--compress',
+            choices=list(COMPRESSORS),
+            default='none',
+            help='Compression for --stream output'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Dump models in this many parallel processes (--stream only)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Rows fetched per database round trip (--stream only)'
+        )
+        parser.add_argument(
+            '--incremental',
+            type=str,
+            default=None,
+            metavar='PREVIOUS_BACKUP',
+            help='Only dump rows created, updated or deleted since the backup in this directory (implies --stream)'
+        )
 
     def handle(self, *args, **options):
         output_dir = options['output']
-        
+        # Taken before reading any table, so the next delta starts from here
+        watermark = timezone.now()
+        parent = self.load_parent(options['incremental']) if options['incremental'] else None
+        if parent is not None:
+            options['stream'] = True
+
         # Create backup directory if it doesn't exist
         os.makedirs(output_dir, exist_ok=True)
-        
+
         models_to_dump = []
-        
+
         if options['models']:
             # Dump specific models
             models_to_dump = options['models'].split(',')
             models_to_dump = [model.strip() for model in models_to_dump]
         else:
-            # Get all models from pet_adoption app
-            pet_adoption_app = apps.get_app_config('pet_adoption')
-            for model in pet_adoption_app.get_models():
-                models_to_dump.append(f"{model._meta.app_label}.{model._meta.object_name}")
-        
-        # Dump each model to a separate JSON file
+            # Get all backed-up models from pet_adoption app
+            models_to_dump = backup_models()
+
+        since = None
+        if parent is not None:
+            since = parse_datetime(parent['watermark']) - WATERMARK_OVERLAP
+
+        if options['stream']:
+            if options['compress'] == 'zstd' and zstandard is None:
+                raise CommandError('--compress zstd requires the "zstandard" package.')
+            files = self.dump_streaming(models_to_dump, output_dir, options, since)
+        else:
+            files = self.dump_json(models_to_dump, output_dir)
+
+        # Create a manifest file
+        manifest_file = os.path.join(output_dir, 'manifest.json')
+        manifest = {
+            'models': models_to_dump,
+            'timestamp': timezone.now().isoformat(),
+            'format': 'jsonl' if options['stream'] else 'json',
+            'compression': options['compress'] if options['stream'] else 'none',
+            'files': files,
+            'type': 'full' if parent is None else 'delta',
+            'watermark': watermark.isoformat(),
+        }
+        if parent is not None:
+            manifest['parent'] = {
+                'path': os.path.abspath(options['incremental']),
+                'watermark': parent['watermark'],
+            }
+            manifest['deleted'] = deleted_pks(since, models_to_dump)
+
+        with open(manifest_file, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Change records from before this backup's starting point are no longer
+        # needed, but only once every model has been backed up from there: a
+        # partial or failed dump leaves the other models' deltas relying on them
+        complete = set(backup_models()) <= set(models_to_dump) and all(
+            files.get(label) for label in models_to_dump
+        )
+        if complete:
+            pruned = prune_changes(since if since is not None else watermark - WATERMARK_OVERLAP)
+            if pruned:
+                self.stdout.write(f'Pruned {pruned} change log entries')
+        else:
+            self.stdout.write('Kept the change log: this backup does not cover every model')
+
+        self.stdout.write(self.style.SUCCESS(f'\nBackup completed! Files saved to {output_dir}'))
+
+    def dump_json(self, models_to_dump, output_dir):
+        """Dump each model to a JSON array file with Django's dumpdata"""
+        files = {}
         for model_label in models_to_dump:
             try:
-                output_file = os.path.join(output_dir, f"{model_label.split('.')[-1].lower()}.json")
-                
+                filename = f"{model_label.split('.')[-1].lower()}.json"
+                output_file = os.path.join(output_dir, filename)
+
                 self.stdout.write(f'Dumping {model_label} to {output_file}...')
-                
+
                 # Use Django's dumpdata command
-                call_command(
-                    'dumpdata',
-                    model_label,
-                    stdout=open(output_file, 'w'),
-                    indent=2,
-                    format='json'
-                )
-                
+                with open(output_file, 'w') as f:
+                    call_command(
+                        'dumpdata',
+                        model_label,
+                        stdout=f,
+                        indent=2,
+                        format='json'
+                    )
+
+                files[model_label] = {
+                    'file': filename,
+                    'rows': apps.get_model(model_label)._default_manager.count(),
+                    'bytes': os.path.getsize(output_file),
+                    'sha256': file_digest(output_file),
+                }
                 self.stdout.write(
                     self.style.SUCCESS(f'Successfully dumped {model_label}')
                 )
@@ -63,15 +196,56 @@ class Command(BaseCommand):
                 self.stdout.write(
                     self.style.ERROR(f'Failed to dump {model_label}: {str(e)}')
                 )
-        
-        # Create a manifest file
-        manifest_file = os.path.join(output_dir, 'manifest.json')
-        manifest = {
-            'models': models_to_dump,
-            'timestamp': str(os.path.getmtime(output_dir))
-        }
-        
-        with open(manifest_file, 'w') as f:
-            json.dump(manifest, f, indent=2)
-        
-        self.stdout.write(self.style.SUCCESS(f'\nBackup completed! Files saved to {output_dir}'))
+        return files
+
+    def load_parent(self, path):
+        """The manifest of the backup an incremental dump builds on"""
+        manifest_file = os.path.join(path, 'manifest.json')
+        try:
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {manifest_file}: {e}')
+        if not manifest.get('watermark'):
+            raise CommandError(
+                f'{manifest_file} has no watermark; take a full backup before incremental ones.'
+            )
+        return manifest
+
+    def dump_streaming(self, models_to_dump, output_dir, options, since=None):
+        """Stream each model to NDJSON, in parallel worker processes if requested"""
+        args = (output_dir, options['compress'], options['chunk_size'], since)
+        workers = min(options['workers'], len(models_to_dump))
+        files = {}
+
+        if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            for model_label in models_to_dump:
+                self.stdout.write(f'Streaming {model_label}...')
+                files[model_label] = self.run_dump(model_label, stream_model, model_label, *args)
+            return files
+
+        # Forked workers must not share the parent's database connection.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {
+                pool.submit(stream_model, model_label, *args): model_label
+                for model_label in models_to_dump
+            }
+            for future in as_completed(futures):
+                model_label = futures[future]
+                files[model_label] = self.run_dump(model_label, future.result)
+        return files
+
+    def run_dump(self, model_label, func, *args):
+        try:
+            result = func(*args)
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Failed to dump {model_label}: {str(e)}')
+            )
+            return None
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully dumped {model_label}: {result['rows']} rows to {result['file']}"
+        ))
+        return result
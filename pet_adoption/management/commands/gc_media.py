@@ -0,0 +1,115 @@
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pet_adoption import uploads
+from pet_adoption.models import ImageUpload, Pet
+from pet_adoption.storage import pet_image_storage
+
+
+PET_IMAGE_DIR = 'images/pets'
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete pet images and resized copies that no pet refers to any more. '
+        'Content-addressed files are shared between pets, so they are never '
+        'deleted when a pet changes its image; this command reclaims them. '
+        'Also deletes chunked uploads that were abandoned'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Only delete files older than this many seconds, so uploads in flight are kept'
+        )
+        parser.add_argument(
+            '--upload-max-age',
+            type=int,
+            default=86400,
+            help='Delete chunked uploads that received nothing for this many seconds'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the files that would be deleted without deleting them'
+        )
+
+    def handle(self, *args, **options):
+        self.collect_uploads(options)
+
+        referenced = set()
+        pets = Pet.objects.exclude(image='').exclude(image__isnull=True).values_list('image', 'image_variants')
+        for image, variants in pets.iterator():
+            referenced.add(image)
+            for formats in (variants or {}).get('sizes', {}).values():
+                referenced.update(formats.values())
+
+        root = pet_image_storage.path(PET_IMAGE_DIR)
+        if not os.path.isdir(root):
+            self.stdout.write(self.style.SUCCESS('No pet images stored'))
+            return
+
+        cutoff = time.time() - options['min_age']
+        removed = reclaimed = kept = 0
+        for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, pet_image_storage.location).replace(os.sep, '/')
+                if name in referenced or os.path.getmtime(path) > cutoff:
+                    kept += 1
+                    continue
+                size = os.path.getsize(path)
+                if options['dry_run']:
+                    self.stdout.write(f'Would delete {name} ({size:,} bytes)')
+                else:
+                    os.remove(path)
+                removed += 1
+                reclaimed += size
+            # Drop the hash prefix directories that are now empty
+            if not options['dry_run'] and dirpath != root and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {removed} unreferenced file(s), {reclaimed:,} bytes; kept {kept}'
+        ))
+
+    def collect_uploads(self, options):
+        """Delete uploads idle for --upload-max-age, and part files without an upload"""
+        now = time.time()
+        cutoff = now - options['upload_max_age']
+        stale = []
+        candidates = ImageUpload.objects.filter(
+            created_at__lt=timezone.now() - timedelta(seconds=options['upload_max_age'])
+        )
+        for upload in candidates:
+            path = uploads.part_path(upload)
+            if not os.path.exists(path) or os.path.getmtime(path) < cutoff:
+                stale.append(upload)
+        for upload in stale:
+            if options['dry_run']:
+                self.stdout.write(f'Would delete upload {upload.pk} ({upload.filename})')
+            else:
+                uploads.discard(upload)
+
+        orphans = 0
+        if os.path.isdir(settings.CHUNKED_UPLOAD_DIR):
+            known = {str(pk) for pk in ImageUpload.objects.values_list('pk', flat=True)}
+            for filename in os.listdir(settings.CHUNKED_UPLOAD_DIR):
+                path = os.path.join(settings.CHUNKED_UPLOAD_DIR, filename)
+                upload_id = filename.removesuffix('.part')
+                if upload_id in known or os.path.getmtime(path) > now - options['min_age']:
+                    continue
+                if not options['dry_run']:
+                    os.remove(path)
+                orphans += 1
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(f'{verb} {len(stale)} abandoned upload(s) and {orphans} orphaned part file(s)')
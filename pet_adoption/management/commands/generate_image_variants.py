@@ -0,0 +1,68 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from pet_adoption.images import generate_variants
+from pet_adoption.models import Pet
+
+
+class Command(BaseCommand):
+    help = 'Generate resized WebP/JPEG copies of pet images that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=multiprocessing.cpu_count(),
+            help='Images processed in parallel processes'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate copies for every image, not only missing or outdated ones'
+        )
+
+    def handle(self, *args, **options):
+        pets = Pet.objects.exclude(image='').exclude(image__isnull=True).only('id', 'image', 'image_variants')
+        jobs = [
+            (pet.pk, pet.image.name) for pet in pets
+            if options['force'] or not pet.has_image_variants()
+        ]
+        if not jobs:
+            self.stdout.write(self.style.SUCCESS('All pet images already have their variants'))
+            return
+
+        self.stdout.write(f'Generating variants for {len(jobs)} image(s)...')
+        results = []
+        if options['workers'] <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            for pet_id, name in jobs:
+                results.append(self.run_job(pet_id, name, generate_variants, pet_id, name, options['force']))
+        else:
+            # Forked workers must not share the parent's database connection.
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=options['workers'], mp_context=context) as pool:
+                futures = {
+                    pool.submit(generate_variants, pet_id, name, options['force']): (pet_id, name)
+                    for pet_id, name in jobs
+                }
+                for future in as_completed(futures):
+                    pet_id, name = futures[future]
+                    results.append(self.run_job(pet_id, name, future.result))
+
+        failed = results.count(False)
+        summary = f'\nGenerated variants for {len(results) - failed} image(s)'
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{summary}; {failed} failed'))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
+
+    def run_job(self, pet_id, name, func, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Failed to process {name} (pet {pet_id}): {str(e)}'))
+            return False
+        return True
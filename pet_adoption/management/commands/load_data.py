@@ -1,7 +1,65 @@
 import json
 import os
-from django.core.management.base import BaseCommand
+import time
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core import serializers
 from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from pet_adoption import cache, donation_stats
+from pet_adoption.backups import (
+    SNAPSHOT_MODELS, dependency_order, is_backup_file, model_for_file, read_records,
+)
+from pet_adoption.models import Donation, Pet
+
+
+@contextmanager
+def relaxed_durability():
+    """
+    Turn off SQLite's fsyncs (and its rollback journal, unless the database
+    is in WAL mode) for the duration of a bulk load. A crash mid-load can
+    corrupt the database, which is fine for a restore that can be re-run.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        synchronous = cursor.fetchone()[0]
+        cursor.execute('PRAGMA journal_mode')
+        journal_mode = cursor.fetchone()[0]
+        cursor.execute('PRAGMA synchronous = OFF')
+        if journal_mode != 'wal':
+            cursor.execute('PRAGMA journal_mode = MEMORY')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA synchronous = {int(synchronous)}')
+            if journal_mode != 'wal':
+                cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+
+
+@contextmanager
+def preserve_timestamps(model):
+    """Keep backed-up auto_now/auto_now_add values instead of stamping the load time"""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
 
 
 class Command(BaseCommand):
@@ -20,73 +78,117 @@ class Command(BaseCommand):
             default=None,
             help='Specific files to load (comma-separated, e.g., "pet.json,adoption.json")'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows inserted per bulk_create call and transaction'
+        )
+        parser.add_argument(
+            '--loaddata',
+            action='store_true',
+            help="Load through Django's loaddata, saving objects one at a time (slower)"
+        )
+        parser.add_argument(
+            '--deltas',
+            type=str,
+            default=None,
+            help='Incremental backup directories to replay on top of --input, oldest first (comma-separated)'
+        )
 
     def handle(self, *args, **options):
         input_dir = options['input']
-        
+
         # Check if backup directory exists
         if not os.path.exists(input_dir):
             self.stdout.write(
                 self.style.WARNING(f'Backup directory {input_dir} does not exist. Skipping data load.')
             )
             return
-        
+
+        deltas = []
+        if options['deltas']:
+            deltas = self.load_chain(input_dir, [d.strip() for d in options['deltas'].split(',')])
+
         files_to_load = []
-        
+
         if options['files']:
             # Load specific files
             files_to_load = options['files'].split(',')
             files_to_load = [f.strip() for f in files_to_load]
         else:
-            # Get all JSON files except manifest
+            # Get all backup files except manifest
             for filename in sorted(os.listdir(input_dir)):
-                if filename.endswith('.json') and filename != 'manifest.json':
+                if is_backup_file(filename):
                     files_to_load.append(filename)
-        
-        # Load each JSON file
+
+        files_to_load = self.order_files(files_to_load)
+
+        # Load each backup file
         loaded_count = 0
-        for filename in files_to_load:
-            filepath = os.path.join(input_dir, filename)
-            
-            if not os.path.exists(filepath):
-                self.stdout.write(
-                    self.style.WARNING(f'File {filepath} not found. Skipping.')
-                )
-                continue
-            
-            try:
-                # Check if file is empty
-                with open(filepath, 'r') as f:
-                    data = json.load(f)
-                
-                if not data:
+        loaded_models = set()
+        failed = []
+        with relaxed_durability():
+            for filename in files_to_load:
+                filepath = os.path.join(input_dir, filename)
+
+                if not os.path.exists(filepath):
                     self.stdout.write(
-                        self.style.WARNING(f'{filename} is empty. Skipping.')
+                        self.style.WARNING(f'File {filepath} not found. Skipping.')
                     )
                     continue
-                
-                self.stdout.write(f'Loading data from {filename}...')
-                
-                # Use Django's loaddata command
-                call_command(
-                    'loaddata',
-                    filepath,
-                    verbosity=1
-                )
-                
+
+                model = model_for_file(filename)
+                if model is not None and model._meta.label in SNAPSHOT_MODELS:
+                    # Derived from the donations; rebuilt once they are loaded
+                    self.stdout.write(f'Skipping {filename}: rebuilt from the loaded donations.')
+                    loaded_models.add(model)
+                    continue
+                try:
+                    self.stdout.write(f'Loading data from {filename}...')
+                    if options['loaddata'] or model is None or model._meta.many_to_many:
+                        # Use Django's loaddata command
+                        call_command('loaddata', filepath, verbosity=1)
+                    else:
+                        rows = self.bulk_load(model, filepath, options['batch_size'])
+                        if not rows:
+                            self.stdout.write(
+                                self.style.WARNING(f'{filename} is empty. Skipping.')
+                            )
+                            continue
+                        loaded_models.add(model)
+
+                    loaded_count += 1
+                    self.stdout.write(
+                        self.style.SUCCESS(f'Successfully loaded {filename}')
+                    )
+                except json.JSONDecodeError as e:
+                    failed.append(filename)
+                    self.stdout.write(
+                        self.style.ERROR(f'JSON decode error in {filename}: {str(e)}')
+                    )
+                except Exception as e:
+                    failed.append(filename)
+                    self.stdout.write(
+                        self.style.ERROR(f'Failed to load {filename}: {str(e)}')
+                    )
+
+            for delta_dir, manifest in deltas:
+                self.stdout.write(f'Applying incremental backup {delta_dir}...')
+                loaded_models.update(self.apply_delta(delta_dir, manifest, options['batch_size']))
                 loaded_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'Successfully loaded {filename}')
-                )
-            except json.JSONDecodeError as e:
-                self.stdout.write(
-                    self.style.ERROR(f'JSON decode error in {filename}: {str(e)}')
-                )
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'Failed to load {filename}: {str(e)}')
-                )
-        
+
+        if loaded_models:
+            self.reset_sequences(loaded_models)
+            if Pet in loaded_models:
+                cache.invalidate(cache.PETS)
+            if Donation in loaded_models or any(
+                model._meta.label in SNAPSHOT_MODELS for model in loaded_models
+            ):
+                self.rebuild_donation_stats()
+
+        if failed:
+            raise CommandError(f'Failed to load {len(failed)} file(s): {", ".join(failed)}')
         if loaded_count > 0:
             self.stdout.write(
                 self.style.SUCCESS(f'\nSuccessfully loaded {loaded_count} file(s)')
@@ -95,3 +197,121 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.WARNING('\nNo data files were loaded')
             )
+
+    def order_files(self, filenames):
+        """Order files so referenced models (Pet) load before their dependents (Adoption)"""
+        models = {filename: model_for_file(filename) for filename in filenames}
+        order = dependency_order({model for model in models.values() if model is not None})
+        rank = {model: position for position, model in enumerate(order)}
+        return sorted(filenames, key=lambda filename: rank.get(models[filename], len(rank)))
+
+    def read_manifest(self, path):
+        manifest_file = os.path.join(path, 'manifest.json')
+        try:
+            with open(manifest_file) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {manifest_file}: {e}')
+
+    def load_chain(self, base_dir, delta_dirs):
+        """
+        Read the delta manifests and check that each one was taken from the
+        backup before it, so no window of changes is silently skipped.
+        """
+        previous = self.read_manifest(base_dir)
+        chain = []
+        for delta_dir in delta_dirs:
+            manifest = self.read_manifest(delta_dir)
+            if manifest.get('type') != 'delta':
+                raise CommandError(f'{delta_dir} is not an incremental backup.')
+            if manifest['parent']['watermark'] != previous.get('watermark'):
+                raise CommandError(
+                    f'{delta_dir} was taken from the backup at {manifest["parent"]["path"]}, '
+                    f'not from the one before it in --deltas.'
+                )
+            chain.append((delta_dir, manifest))
+            previous = manifest
+        return chain
+
+    def apply_delta(self, delta_dir, manifest, batch_size):
+        """Replay one incremental backup: deletions first, then changed rows"""
+        deleted = manifest.get('deleted', {})
+        for model in reversed(dependency_order(apps.get_model(label) for label in deleted)):
+            pks = deleted[model._meta.label]
+            with transaction.atomic():
+                for start in range(0, len(pks), batch_size):
+                    model._default_manager.filter(pk__in=pks[start:start + batch_size]).delete()
+            self.stdout.write(f'  {model._meta.label}: {len(pks)} rows deleted')
+
+        files = {
+            apps.get_model(label): entry
+            for label, entry in manifest['files'].items() if entry is not None
+        }
+        for model in dependency_order(files):
+            if model._meta.label in SNAPSHOT_MODELS:
+                continue
+            entry = files[model]
+            with transaction.atomic():
+                if entry.get('mode') == 'full':
+                    model._default_manager.all().delete()
+                self.bulk_load(model, os.path.join(delta_dir, entry['file']), batch_size)
+        return set(files) | {apps.get_model(label) for label in deleted}
+
+    def rebuild_donation_stats(self):
+        """Recompute the donation totals and hourly rollup from the Donation table"""
+        self.stdout.write('Rebuilding donation totals and rollup...')
+        donation_stats.rebuild_totals()
+        buckets = donation_stats.refresh_rollup(full=True)
+        self.stdout.write(f'  {buckets} hourly rollup bucket(s)')
+
+    def bulk_load(self, model, filepath, batch_size):
+        """
+        Upsert every object in ``filepath`` with batched bulk_create calls,
+        one transaction per batch, parsing the file once. Like loaddata,
+        rows whose primary key already exists are overwritten.
+        """
+        pk_name = model._meta.pk.name
+        update_fields = [
+            field.name for field in model._meta.concrete_fields if not field.primary_key
+        ]
+        upsert = {}
+        if update_fields and connection.features.supports_update_conflicts_with_target:
+            upsert = {
+                'update_conflicts': True,
+                'unique_fields': [pk_name],
+                'update_fields': update_fields,
+            }
+
+        rows = 0
+        started = time.perf_counter()
+        with preserve_timestamps(model):
+            batch = []
+            objects = serializers.deserialize('python', read_records(filepath), ignorenonexistent=True)
+            for deserialized in objects:
+                batch.append(deserialized.object)
+                if len(batch) >= batch_size:
+                    rows += self.insert_batch(model, batch, upsert)
+                    batch = []
+            if batch:
+                rows += self.insert_batch(model, batch, upsert)
+
+        elapsed = time.perf_counter() - started
+        if rows:
+            rate = rows / elapsed if elapsed else float(rows)
+            self.stdout.write(
+                f'  {model._meta.label}: {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)'
+            )
+        return rows
+
+    def insert_batch(self, model, batch, upsert):
+        with transaction.atomic():
+            model._default_manager.bulk_create(batch, **upsert)
+        return len(batch)
+
+    def reset_sequences(self, models):
+        """Move primary key sequences past the loaded ids (a no-op on SQLite)"""
+        statements = connection.ops.sequence_reset_sql(no_style(), list(models))
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -0,0 +1,39 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from pet_adoption.search import FTS_INDEXES, create_fts_index, rebuild_fts_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite FTS5 full-text search indexes from existing data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--models',
+            type=str,
+            default=None,
+            help='Specific models to reindex (comma-separated, e.g., "pet_adoption.Pet,pet_adoption.Contact")'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Full-text search indexes are only available on SQLite.')
+
+        labels = list(FTS_INDEXES)
+        if options['models']:
+            labels = [label.strip() for label in options['models'].split(',')]
+            unknown = [label for label in labels if label not in FTS_INDEXES]
+            if unknown:
+                raise CommandError(f'Not full-text indexed: {", ".join(unknown)}')
+
+        for label in labels:
+            model = apps.get_model(label)
+            content_table = model._meta.db_table
+            self.stdout.write(f'Rebuilding search index for {label}...')
+            with transaction.atomic(), connection.cursor() as cursor:
+                create_fts_index(cursor, content_table, FTS_INDEXES[label])
+                rebuild_fts_index(cursor, content_table)
+            self.stdout.write(
+                self.style.SUCCESS(f'Successfully indexed {model.objects.count()} {label} rows')
+            )
@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from pet_adoption import donation_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute donation running totals from the Donation table and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Overwrite the stored totals with the recomputed values'
+        )
+
+    def handle(self, *args, **options):
+        expected = donation_stats.compute_totals()
+        stored = donation_stats.stored_totals()
+        empty = (Decimal(0), 0)
+
+        drift = []
+        for period in sorted(set(expected) | set(stored)):
+            want = expected.get(period, empty)
+            have = stored.get(period, empty)
+            if want[0] != have[0] or want[1] != have[1]:
+                drift.append((period, have, want))
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(
+                f'Donation totals are consistent ({len(expected)} periods checked)'
+            ))
+            return
+
+        for period, have, want in drift:
+            self.stdout.write(self.style.WARNING(
+                f'{period}: stored {have[0]} / {have[1]} donations, '
+                f'expected {want[0]} / {want[1]} '
+                f'(drift {have[0] - want[0]} / {have[1] - want[1]})'
+            ))
+
+        if options['fix']:
+            donation_stats.rebuild_totals()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt totals, fixed {len(drift)} period(s)'))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f'\n{len(drift)} period(s) drifted; rerun with --fix to rebuild'
+            ))
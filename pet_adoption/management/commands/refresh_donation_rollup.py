@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from pet_adoption import donation_stats
+
+
+class Command(BaseCommand):
+    help = 'Refresh the hourly donation rollup from its watermark'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Discard the rollup and rebuild it from the whole Donation table'
+        )
+
+    def handle(self, *args, **options):
+        watermark = donation_stats.rollup_watermark()
+        if options['full'] or watermark is None:
+            self.stdout.write('Rebuilding donation rollup from scratch...')
+        else:
+            self.stdout.write(f'Refreshing donation rollup from {watermark.isoformat()}...')
+
+        buckets = donation_stats.refresh_rollup(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {buckets} hourly bucket(s)'))
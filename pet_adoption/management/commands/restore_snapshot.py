@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from pet_adoption import cache
+from pet_adoption.backups import DECOMPRESSORS, file_digest, integrity_check, zstandard
+
+
+class Command(BaseCommand):
+    help = 'Restore the SQLite database from a snapshot taken with snapshot_db'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--input',
+            type=str,
+            default='/app/backups',
+            help='Directory holding the snapshot and its manifest'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('restore_snapshot only supports the sqlite3 database backend.')
+
+        input_dir = options['input']
+        manifest_file = os.path.join(input_dir, 'manifest.json')
+        try:
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {manifest_file}: {e}')
+        if manifest.get('format') != 'sqlite':
+            raise CommandError(f'{input_dir} does not hold a snapshot_db snapshot.')
+
+        target_path = str(connection.settings_dict['NAME'])
+        snapshot = os.path.join(input_dir, manifest['file'])
+        temp_file = f'{target_path}.restore'
+
+        try:
+            self.stdout.write(f'Unpacking {snapshot}...')
+            self.unpack(snapshot, temp_file)
+
+            if file_digest(temp_file) != manifest['sha256']:
+                raise CommandError(f'{snapshot} does not match the checksum in its manifest.')
+            result = integrity_check(temp_file)
+            if result != 'ok':
+                raise CommandError(f'Snapshot failed the integrity check:\n{result}')
+
+            self.stdout.write(f'Restoring into {target_path}...')
+            self.restore(temp_file, target_path)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+        cache.invalidate(cache.PETS)
+        self.stdout.write(self.style.SUCCESS(f'\nRestored snapshot from {manifest["timestamp"]}'))
+
+    def unpack(self, snapshot, target):
+        suffix = os.path.splitext(snapshot)[1]
+        if suffix == '.zst' and zstandard is None:
+            raise CommandError(f'{snapshot} is zstd-compressed; install the "zstandard" package to read it.')
+        opener = DECOMPRESSORS.get(suffix, lambda path: open(path, 'rb'))
+        with opener(snapshot) as src, open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+
+    def restore(self, source_path, target_path):
+        """
+        Copy the snapshot over the live database in a single backup step.
+        SQLite holds the target's write lock for the whole step, so other
+        connections see either the old database or the restored one, and
+        their open file handles stay valid (unlike replacing the file).
+        """
+        connection.close()
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path, timeout=30)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,135 @@
+import json
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# SQLite plan lines: "SCAN pet_adoption_adoption" is a full table scan, while
+# "SCAN t USING INDEX i" walks an index and "SEARCH ..." uses one.
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY')
+AGGREGATE_FILTER = re.compile(r' FILTER \(WHERE [^()]*(?:\([^()]*\)[^()]*)*\)')
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def filtered_columns(sql, alias):
+    """Columns of ``alias`` compared in the WHERE clause of ``sql``, then those it is ordered by"""
+    column = rf'"{re.escape(alias)}"\."(\w+)"'
+    # Aggregate FILTER (WHERE ...) clauses don't narrow the rows scanned
+    sql = AGGREGATE_FILTER.sub('', sql)
+    rest, _, order_by = sql.partition(' ORDER BY ')
+    where = rest.partition(' WHERE ')[2].partition(' GROUP BY ')[0]
+    columns = re.findall(rf'{column}\s*(?:=|<|>|IN\b|IS\b|LIKE\b|BETWEEN\b)', where)
+    columns += re.findall(column, order_by.partition(' LIMIT ')[0])
+    return list(dict.fromkeys(columns))
+
+
+def index_advice(sql, plan):
+    """Scans and sorts in ``plan`` that an index would avoid, with the columns to index"""
+    advice = []
+    for line in plan or []:
+        line = line.strip()
+        match = FULL_SCAN.match(line)
+        if match:
+            table, alias = match.group(1), match.group(2) or match.group(1)
+            columns = filtered_columns(sql, alias)
+            # Without a filter or ordering on the table, reading all of it is the job
+            if columns:
+                advice.append(f'full scan of {table}; an index on ({", ".join(columns)}) would avoid it')
+        elif TEMP_SORT.search(line):
+            advice.append('sorted in a temporary b-tree; an index matching the ORDER BY would avoid it')
+    return advice
+
+
+class Command(BaseCommand):
+    help = (
+        'Summarize the slow query log per query fingerprint: count, p50, p95 '
+        'and max duration, the views that ran the query, and full table scans '
+        'or sorts that an index would avoid'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log',
+            type=str,
+            default=settings.SLOW_QUERY_LOG,
+            help='Slow query log to read'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=20,
+            help='Number of fingerprints to show, by total time'
+        )
+        parser.add_argument(
+            '--origin',
+            type=str,
+            default=None,
+            help='Only queries run by this view, e.g. AdoptionViewSet.list'
+        )
+
+    def handle(self, *args, **options):
+        if not options['log']:
+            raise CommandError('The slow query log is disabled (SLOW_QUERY_LOG is empty)')
+        try:
+            with open(options['log']) as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            self.stdout.write(self.style.SUCCESS(f'No slow queries logged ({options["log"]} does not exist)'))
+            return
+
+        groups = {}
+        skipped = 0
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if options['origin'] and entry['origin'] != options['origin']:
+                continue
+            group = groups.setdefault(entry['fingerprint'], {
+                'sql': entry['sql'], 'durations': [], 'origins': Counter(), 'plan': None,
+            })
+            group['durations'].append(entry['duration_ms'])
+            group['origins'][entry['origin']] += 1
+            # The latest plan reflects the current indexes
+            group['plan'] = entry['plan'] or group['plan']
+
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'Skipped {skipped} unreadable line(s)'))
+        if not groups:
+            self.stdout.write(self.style.SUCCESS('No slow queries logged'))
+            return
+
+        ranked = sorted(groups.items(), key=lambda item: sum(item[1]['durations']), reverse=True)
+        flagged = 0
+        for fingerprint, group in ranked[:options['top']]:
+            durations = group['durations']
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{fingerprint}  {len(durations)}x  p50 {percentile(durations, 0.5):.1f} ms  '
+                f'p95 {percentile(durations, 0.95):.1f} ms  max {max(durations):.1f} ms  '
+                f'total {sum(durations):.0f} ms'
+            ))
+            origins = ', '.join(f'{origin} ({count})' for origin, count in group['origins'].most_common())
+            self.stdout.write(f'  from: {origins}')
+            self.stdout.write(f'  sql:  {group["sql"][:500]}')
+            for line in group['plan'] or ['(no plan captured)']:
+                self.stdout.write(f'  plan: {line}')
+            advice = index_advice(group['sql'], group['plan'])
+            if advice:
+                flagged += 1
+            for note in advice:
+                self.stdout.write(self.style.WARNING(f'  ! {note}'))
+            self.stdout.write('')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(groups)} slow query fingerprint(s), {flagged} of the top '
+            f'{min(len(ranked), options["top"])} with scans an index would avoid'
+        ))
@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from pet_adoption.backups import COMPRESSORS, file_digest, integrity_check, zstandard
+
+
+class Command(BaseCommand):
+    help = (
+        "Take a consistent hot snapshot of the SQLite database with SQLite's "
+        'online backup API'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            default='/app/backups',
+            help='Output directory for the snapshot'
+        )
+        parser.add_argument(
+            '--compress',
+            choices=list(COMPRESSORS),
+            default='none',
+            help='Compression for the snapshot file'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=256,
+            help='Pages copied per backup step; writers can run between steps'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Seconds to sleep between backup steps'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('snapshot_db only supports the sqlite3 database backend.')
+        if options['compress'] == 'zstd' and zstandard is None:
+            raise CommandError('--compress zstd requires the "zstandard" package.')
+
+        source_path = str(connection.settings_dict['NAME'])
+        output_dir = options['output']
+        os.makedirs(output_dir, exist_ok=True)
+
+        suffix, opener = COMPRESSORS[options['compress']]
+        filename = f'db.sqlite3{suffix}'
+        output_file = os.path.join(output_dir, filename)
+        temp_file = os.path.join(output_dir, '.db.sqlite3.partial')
+
+        self.stdout.write(f'Snapshotting {source_path}...')
+        started = time.perf_counter()
+        try:
+            pages = self.copy(source_path, temp_file, options['pages'], options['pause'])
+            result = integrity_check(temp_file)
+            if result != 'ok':
+                raise CommandError(f'Snapshot failed the integrity check:\n{result}')
+
+            sha256 = file_digest(temp_file)
+            size = os.path.getsize(temp_file)
+            if options['compress'] == 'none':
+                os.replace(temp_file, output_file)
+            else:
+                partial = f'{output_file}.partial'
+                with open(temp_file, 'rb') as src, opener(partial) as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+                os.replace(partial, output_file)
+        finally:
+            for path in (temp_file, f'{output_file}.partial'):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        manifest = {
+            'timestamp': timezone.now().isoformat(),
+            'format': 'sqlite',
+            'compression': options['compress'],
+            'file': filename,
+            'pages': pages,
+            'bytes': size,
+            'sha256': sha256,
+        }
+        with open(os.path.join(output_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'\nSnapshot completed in {elapsed:.2f}s: {pages} pages, {size:,} bytes, '
+            f'saved to {output_file}'
+        ))
+
+    def copy(self, source_path, target_path, pages, pause):
+        """
+        Copy the live database ``pages`` pages at a time. The source is only
+        read-locked during each step, so gunicorn workers can write between
+        steps; SQLite restarts the copy if they do, which keeps the snapshot
+        consistent.
+        """
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        progress = {'pages': 0}
+
+        def step(status, remaining, total):
+            progress['pages'] = total
+            if pause:
+                time.sleep(pause)
+
+        source = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True)
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target, pages=pages, progress=step)
+        finally:
+            target.close()
+            source.close()
+        return progress['pages']
@@ -0,0 +1,229 @@
+import contextvars
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Per-request timings and per-route latency histograms.
+#
+# RequestMetricsMiddleware opens a RequestTimings for every request, to which
+# SQL statements, serialization and rendering add their time; the middleware
+# reports it in a Server-Timing header. Each gunicorn worker then adds the
+# request to its own histograms and writes them to METRICS_DIR/<pid>-<id>.json
+# at most every METRICS_FLUSH_INTERVAL seconds, and /metrics sums the files of
+# all workers into the Prometheus text format. Files of workers that exited
+# are kept, so the totals never go backwards; the random id keeps a new worker
+# that reuses a pid from overwriting them. gunicorn.conf.py empties METRICS_DIR
+# when the server starts, so each run counts from zero. The response cache
+# keeps its hit/miss counters the same way, in METRICS_DIR/cache.
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Phases summed per route besides the request duration
+PHASES = ('db', 'serialize', 'render')
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+_lock = threading.Lock()
+_routes = {}
+_last_flush = time.monotonic()
+_name_lock = threading.Lock()
+_file_name = None
+_file_pid = None
+
+
+class RequestTimings:
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(PHASES, 0)
+        self.depth = dict.fromkeys(PHASES, 0)
+
+    def add(self, phase, seconds):
+        self.seconds[phase] += seconds
+        self.counts[phase] += 1
+
+    def server_timing(self, total):
+        entries = [f'db;dur={self.seconds["db"] * 1000:.2f};desc="{self.counts["db"]} queries"']
+        for phase in ('serialize', 'render'):
+            if self.counts[phase]:
+                entries.append(f'{phase};dur={self.seconds[phase] * 1000:.2f}')
+        entries.append(f'app;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+
+def start():
+    """Collect timings for the current request; returns them and a token for ``stop``"""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to ``phase``; nested blocks count once"""
+    timings = _current.get()
+    if timings is None or timings.depth[phase]:
+        yield
+        return
+    timings.depth[phase] += 1
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.depth[phase] -= 1
+        timings.add(phase, time.perf_counter() - start_time)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """Connection execute wrapper timing every statement"""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start_time = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add('db', time.perf_counter() - start_time)
+
+
+def observe(route, method, seconds, timings):
+    """Add a finished request to this worker's histograms"""
+    with _lock:
+        entry = _routes.get((route, method))
+        if entry is None:
+            entry = _routes[(route, method)] = {
+                'route': route,
+                'method': method,
+                'buckets': [0] * len(BUCKETS),
+                'count': 0,
+                'sum': 0.0,
+                'db_queries': 0,
+                **{f'{phase}_seconds': 0.0 for phase in PHASES},
+            }
+        bucket = bisect_left(BUCKETS, seconds)
+        if bucket < len(BUCKETS):
+            entry['buckets'][bucket] += 1
+        entry['count'] += 1
+        entry['sum'] += seconds
+        entry['db_queries'] += timings.counts['db']
+        for phase in PHASES:
+            entry[f'{phase}_seconds'] += timings.seconds[phase]
+        due = time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL
+    if due:
+        flush()
+
+
+def write_worker_file(directory, snapshot):
+    """Replace this worker's file in ``directory`` with the JSON text ``snapshot``"""
+    global _file_name, _file_pid
+    with _name_lock:
+        # Named on first write in this process, not at import, which a
+        # preloading master would share with every worker it forks
+        if _file_pid != os.getpid():
+            _file_pid = os.getpid()
+            _file_name = f'{_file_pid}-{uuid.uuid4().hex[:8]}.json'
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, _file_name)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as f:
+        f.write(snapshot)
+    os.replace(temporary, path)
+
+
+def read_worker_files(directory):
+    """Yield the data of every worker's file in ``directory``"""
+    if not os.path.isdir(directory):
+        return
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                yield json.load(f)
+        except (OSError, ValueError):
+            continue
+
+
+def flush():
+    """Write this worker's histograms where /metrics of any worker reads them"""
+    global _last_flush
+    with _lock:
+        snapshot = json.dumps(list(_routes.values()))
+        _last_flush = time.monotonic()
+    write_worker_file(settings.METRICS_DIR, snapshot)
+
+
+def clear():
+    """Delete the histograms of every worker, e.g. of a previous server run"""
+    shutil.rmtree(settings.METRICS_DIR, ignore_errors=True)
+
+
+def collect():
+    """Histograms of all workers, summed per route and method"""
+    flush()
+    totals = {}
+    for entries in read_worker_files(settings.METRICS_DIR):
+        for entry in entries:
+            key = (entry['route'], entry['method'])
+            if key not in totals:
+                totals[key] = entry
+                continue
+            total = totals[key]
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], entry['buckets'])]
+            for name, value in entry.items():
+                if name not in ('route', 'method', 'buckets'):
+                    total[name] += value
+    return [totals[key] for key in sorted(totals)]
+
+
+def _labels(entry, **extra):
+    labels = {'route': entry['route'], 'method': entry['method'], **extra}
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def exposition():
+    """All workers' metrics in the Prometheus text format"""
+    entries = collect()
+    lines = [
+        '# HELP http_request_duration_seconds Time to answer a request, by route.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    for entry in entries:
+        cumulative = 0
+        for bound, count in zip(BUCKETS, entry['buckets']):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{_labels(entry, le=bound)} {cumulative}')
+        lines.append(f'http_request_duration_seconds_bucket{_labels(entry, le="+Inf")} {entry["count"]}')
+        lines.append(f'http_request_duration_seconds_sum{_labels(entry)} {entry["sum"]}')
+        lines.append(f'http_request_duration_seconds_count{_labels(entry)} {entry["count"]}')
+
+    counters = [
+        ('http_request_db_queries_total', 'db_queries', 'SQL statements run, by route.'),
+        ('http_request_db_seconds_total', 'db_seconds', 'Time spent in SQL statements, by route.'),
+        ('http_request_serialize_seconds_total', 'serialize_seconds', 'Time spent serializing API data, by route.'),
+        ('http_request_render_seconds_total', 'render_seconds', 'Time spent rendering responses, by route.'),
+    ]
+    for metric, name, description in counters:
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} counter')
+        for entry in entries:
+            lines.append(f'{metric}{_labels(entry)} {entry[name]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,104 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics, profiling, slow_queries
+
+
+class RequestMetricsMiddleware:
+    """
+    Time each request's SQL, serialization and rendering, report them in a
+    Server-Timing header and add the request to the per-route histograms
+    served at /metrics. With REQUEST_METRICS off the middleware is unloaded
+    at startup and costs nothing.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        timings, token = metrics.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.sql_wrapper))
+                response = self.get_response(request)
+        finally:
+            metrics.stop(token)
+        total = time.perf_counter() - start
+
+        server_timing = timings.server_timing(total)
+        if response.has_header('Server-Timing'):
+            server_timing = f'{response["Server-Timing"]}, {server_timing}'
+        response['Server-Timing'] = server_timing
+
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        metrics.observe(route, request.method, total, timings)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called just before the response is rendered; the callback runs
+        # right after, so this covers templates and DRF renderers alike.
+        timings = metrics.current()
+        start = time.perf_counter()
+
+        def rendered(response):
+            timings.add('render', time.perf_counter() - start)
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class SlowQueryMiddleware:
+    """
+    Log statements that take SLOW_QUERY_THRESHOLD_MS or longer, with their
+    query plan and the view that ran them, to SLOW_QUERY_LOG. Unloaded when
+    SLOW_QUERY_LOG is empty.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_LOG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = slow_queries.set_origin(None)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(slow_queries.slow_query_wrapper))
+                return self.get_response(request)
+        finally:
+            slow_queries.reset_origin(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        slow_queries.set_origin(slow_queries.view_origin(request, view_func))
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests that ask for it with the profiling token or a staff
+    user's ?profile=1, and PROFILING_SAMPLE_RATE of the rest. Unloaded when
+    PROFILING_DIR is empty.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = profiling.profile_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        with profiling.RequestProfile(mode) as profile:
+            response = self.get_response(request)
+        profile.save(request, response)
+        return response
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+from pet_adoption.search import create_fts_index, drop_fts_index, rebuild_fts_index
+
+
+FTS_TABLES = {
+    'pet_adoption_pet': ['name', 'breed', 'description'],
+    'pet_adoption_contact': ['name', 'email', 'message'],
+    'pet_adoption_volunteer': ['first_name', 'last_name', 'email'],
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for content_table, columns in FTS_TABLES.items():
+            create_fts_index(cursor, content_table, columns)
+            rebuild_fts_index(cursor, content_table)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for content_table in FTS_TABLES:
+            drop_fts_index(cursor, content_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_adoption', '0003_rename_bio_volunteer_experience_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0 on 2026-10-18 18:23
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_totals(apps, schema_editor):
+    Donation = apps.get_model('pet_adoption', 'Donation')
+    DonationTotal = apps.get_model('pet_adoption', 'DonationTotal')
+    rows = (
+        Donation.objects.filter(payment_status='completed')
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(amount=Sum('amount'), count=Count('pk'))
+        .order_by()
+    )
+    totals = [
+        DonationTotal(period=row['day'].isoformat(), total_amount=row['amount'], donation_count=row['count'])
+        for row in rows
+    ]
+    totals.append(DonationTotal(
+        period='all',
+        total_amount=sum((total.total_amount for total in totals), 0),
+        donation_count=sum(total.donation_count for total in totals),
+    ))
+    DonationTotal.objects.bulk_create(totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_adoption', '0004_fts_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonationTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(help_text="'all' or an ISO date (YYYY-MM-DD)", max_length=10)),
+                ('currency', models.CharField(default='USD', max_length=3)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('donation_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['period'],
+                'constraints': [models.UniqueConstraint(fields=('period', 'currency'), name='unique_donation_total_period')],
+            },
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_adoption', '0005_donationtotal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(help_text='Start of the hour')),
+                ('is_custom', models.BooleanField(default=False)),
+                ('is_anonymous', models.BooleanField(default=False)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('donation_count', models.PositiveIntegerField(default=0)),
+                ('stale', models.BooleanField(default=False)),
+            ],
+            options={
+                'ordering': ['bucket'],
+                'indexes': [models.Index(fields=['stale', 'bucket'], name='donation_rollup_stale_idx')],
+                'constraints': [models.UniqueConstraint(fields=('bucket', 'is_custom', 'is_anonymous'), name='unique_donation_rollup_bucket')],
+            },
+        ),
+    ]
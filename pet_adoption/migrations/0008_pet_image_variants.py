@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 18:35
+
+from django.db import migrations, models
+
+from pet_adoption.search import restore_fts_index
+
+
+# Rebuilding pet_adoption_pet on SQLite drops the FTS triggers from 0004
+PET_FTS_COLUMNS = ['name', 'breed', 'description']
+
+
+def restore_pet_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        restore_fts_index(cursor, 'pet_adoption_pet', PET_FTS_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_adoption', '0007_changelog'),
+    ]
+
+    operations = [
+        # Restores the triggers when migrating backwards past this table rebuild
+        migrations.RunPython(migrations.RunPython.noop, restore_pet_search_index),
+        migrations.AddField(
+            model_name='pet',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(restore_pet_search_index, migrations.RunPython.noop),
+    ]
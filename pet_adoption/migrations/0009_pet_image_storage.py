@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 18:37
+
+import pet_adoption.storage
+from django.db import migrations, models
+
+from pet_adoption.search import restore_fts_index
+
+
+# Rebuilding pet_adoption_pet on SQLite drops the FTS triggers from 0004
+PET_FTS_COLUMNS = ['name', 'breed', 'description']
+
+
+def restore_pet_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        restore_fts_index(cursor, 'pet_adoption_pet', PET_FTS_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_adoption', '0008_pet_image_variants'),
+    ]
+
+    operations = [
+        # Restores the triggers when migrating backwards past this table rebuild
+        migrations.RunPython(migrations.RunPython.noop, restore_pet_search_index),
+        migrations.AlterField(
+            model_name='pet',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=pet_adoption.storage.ContentAddressedStorage(), upload_to='images/pets/'),
+        ),
+        migrations.RunPython(restore_pet_search_index, migrations.RunPython.noop),
+    ]
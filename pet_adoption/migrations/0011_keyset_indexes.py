@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_adoption', '0010_imageupload'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adoption',
+            index=models.Index(fields=['applied_at', 'id'], name='adoption_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['created_at', 'id'], name='contact_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['created_at', 'id'], name='donation_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newslettersubscription',
+            index=models.Index(fields=['subscribed_at', 'id'], name='newsletter_subscribed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['created_at', 'id'], name='pet_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteer',
+            index=models.Index(fields=['applied_at', 'id'], name='volunteer_applied_idx'),
+        ),
+    ]
@@ -2,14 +2,22 @@ from .pet import Pet
 from .contact import Contact
 from .volunteer import Volunteer
 from .donation import Donation
+from .donation_total import DonationTotal
+from .donation_rollup import DonationRollup
 from .adoption import Adoption
 from .newsletter import NewsletterSubscription
+from .change_log import ChangeLog
+from .image_upload import ImageUpload
 
 __all__ = [
     'Pet',
     'Contact',
     'Volunteer',
     'Donation',
+    'DonationTotal',
+    'DonationRollup',
     'Adoption',
     'NewsletterSubscription',
+    'ChangeLog',
+    'ImageUpload',
 ]
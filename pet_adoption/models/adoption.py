@@ -35,6 +35,10 @@ class Adoption(models.Model):
     
     class Meta:
         ordering = ['-applied_at']
+        indexes = [
+            # Keyset pagination on the default ordering (pk as tiebreaker)
+            models.Index(fields=['applied_at', 'id'], name='adoption_applied_idx'),
+        ]
     
     def __str__(self):
         return f"{self.adopter_name} adopting {self.pet.name} - {self.status}"
@@ -0,0 +1,23 @@
+from django.db import models
+
+class ChangeLog(models.Model):
+    """Saves and deletions of rows that incremental backups cannot detect from updated_at"""
+    
+    ACTION_CHOICES = [
+        ('save', 'Saved'),
+        ('delete', 'Deleted'),
+    ]
+    
+    model = models.CharField(max_length=100, help_text="Model label, e.g. pet_adoption.Donation")
+    object_pk = models.CharField(max_length=64)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['changed_at']
+        indexes = [
+            models.Index(fields=['changed_at', 'model'], name='change_log_changed_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.action} {self.model} #{self.object_pk} at {self.changed_at}"
@@ -24,6 +24,10 @@ class Contact(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination on the default ordering (pk as tiebreaker)
+            models.Index(fields=['created_at', 'id'], name='contact_created_idx'),
+        ]
     
     def __str__(self):
         return f"Contact from {self.name} - {self.created_at.strftime('%Y-%m-%d')}"
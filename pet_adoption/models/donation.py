@@ -36,6 +36,10 @@ class Donation(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination on the default ordering (pk as tiebreaker)
+            models.Index(fields=['created_at', 'id'], name='donation_created_idx'),
+        ]
     
     def __str__(self):
         return f"Donation of ${self.amount} - {self.payment_status}"
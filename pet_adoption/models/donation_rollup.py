@@ -0,0 +1,28 @@
+from django.db import models
+
+class DonationRollup(models.Model):
+    """Completed donation totals pre-aggregated per hour and donation kind"""
+    
+    bucket = models.DateTimeField(help_text="Start of the hour")
+    is_custom = models.BooleanField(default=False)
+    is_anonymous = models.BooleanField(default=False)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    donation_count = models.PositiveIntegerField(default=0)
+    
+    # Set when a donation in an already rolled-up hour changes
+    stale = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['bucket']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['bucket', 'is_custom', 'is_anonymous'],
+                name='unique_donation_rollup_bucket'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['stale', 'bucket'], name='donation_rollup_stale_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.bucket:%Y-%m-%d %H:00}: {self.total_amount} ({self.donation_count})"
@@ -0,0 +1,22 @@
+from django.db import models
+
+class DonationTotal(models.Model):
+    """Running totals of completed donations, overall and per day"""
+    
+    # Period value used for the all-time row; daily rows use the ISO date
+    OVERALL = 'all'
+    
+    period = models.CharField(max_length=10, help_text="'all' or an ISO date (YYYY-MM-DD)")
+    currency = models.CharField(max_length=3, default='USD')
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    donation_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['period']
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'currency'], name='unique_donation_total_period'),
+        ]
+    
+    def __str__(self):
+        return f"{self.period} {self.currency}: {self.total_amount} ({self.donation_count})"
@@ -0,0 +1,23 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+class ImageUpload(models.Model):
+    """
+    A pet image being uploaded in chunks. The bytes received so far live in
+    a temporary file (see pet_adoption.uploads) until the upload is finalized.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    pet = models.ForeignKey('Pet', on_delete=models.CASCADE, related_name='image_uploads')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Total size of the image in bytes")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} for {self.pet_id} ({self.size} bytes)"
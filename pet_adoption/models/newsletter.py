@@ -9,6 +9,10 @@ class NewsletterSubscription(models.Model):
     
     class Meta:
         ordering = ['-subscribed_at']
+        indexes = [
+            # Keyset pagination on the default ordering (pk as tiebreaker)
+            models.Index(fields=['subscribed_at', 'id'], name='newsletter_subscribed_idx'),
+        ]
     
     def __str__(self):
         return f"{self.email} (Active: {self.is_active})"
@@ -1,5 +1,8 @@
+from django.core.files.storage import default_storage
 from django.db import models
 
+from ..storage import pet_image_storage
+
 class Pet(models.Model):
     """Model representing a pet available for adoption"""
     
@@ -44,7 +47,10 @@ class Pet(models.Model):
     
     # Description
     description = models.TextField(blank=True, null=True)
-    image = models.ImageField(upload_to='images/pets/', blank=True, null=True)
+    image = models.ImageField(upload_to='images/pets/', storage=pet_image_storage, blank=True, null=True)
+    # Resized copies of image, filled in by pet_adoption.images:
+    # {'source': image name, 'sizes': {'320w': {'webp': name, 'jpeg': name}, ...}}
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -53,6 +59,35 @@ class Pet(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Pets"
+        indexes = [
+            # Keyset pagination on the default ordering (pk as tiebreaker)
+            models.Index(fields=['created_at', 'id'], name='pet_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.get_pet_type_display()})"
+    
+    def has_image_variants(self):
+        """Whether the resized copies were generated from the current image"""
+        return bool(self.image) and self.image_variants.get('source') == self.image.name
+    
+    def image_srcset(self, image_format, url=None):
+        """srcset attribute value for the resized copies in ``image_format``"""
+        if not self.has_image_variants():
+            return ''
+        return self.variants_srcset(self.image_variants, image_format, url or default_storage.url)
+    
+    @staticmethod
+    def variants_srcset(image_variants, image_format, url):
+        return ', '.join(
+            f'{url(variant[image_format])} {width}'
+            for width, variant in image_variants['sizes'].items()
+        )
+    
+    @property
+    def image_webp_srcset(self):
+        return self.image_srcset('webp')
+    
+    @property
+    def image_jpeg_srcset(self):
+        return self.image_srcset('jpeg')
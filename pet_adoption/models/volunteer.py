@@ -34,6 +34,10 @@ class Volunteer(models.Model):
     
     class Meta:
         ordering = ['-applied_at']
+        indexes = [
+            # Keyset pagination on the default ordering (pk as tiebreaker)
+            models.Index(fields=['applied_at', 'id'], name='volunteer_applied_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - ({self.status})"
@@ -0,0 +1,189 @@
+import cProfile
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+# Request profiling.
+#
+# A request carrying an X-Profile-Token header that matches PROFILING_TOKEN,
+# or a staff user's request with ?profile=1, runs under cProfile and a stack
+# sampler. PROFILING_SAMPLE_RATE of all other requests run under the stack
+# sampler alone, which only reads the request thread's stack every
+# PROFILING_INTERVAL seconds, so it can stay on in production. Each profile is
+# stored in PROFILING_DIR as <id>.json (what was profiled), <id>.collapsed
+# (sampled stacks in the collapsed format flamegraph tools read) and, for
+# requested profiles, <id>.pstats. Every PRUNE_EVERY saves, a process deletes
+# all but the newest PROFILING_MAX_PROFILES.
+
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_PARAM = 'profile'
+PROFILE_PARAM_VALUES = ('1', 'true', 'yes', 'on')
+
+PRUNE_EVERY = 20
+
+_saved = 0
+
+PROFILE_FILE = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}\.(pstats|collapsed)$')
+
+
+def profile_mode(request):
+    """'requested', 'sampled' or None for a request that isn't profiled"""
+    token = settings.PROFILING_TOKEN
+    header = request.headers.get(PROFILE_HEADER)
+    if token and header and constant_time_compare(header, token):
+        return 'requested'
+    if request.GET.get(PROFILE_PARAM, '').lower() in PROFILE_PARAM_VALUES and request.user.is_staff:
+        return 'requested'
+    if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+        return 'sampled'
+    return None
+
+
+@lru_cache(maxsize=1024)
+def short_path(filename):
+    if filename.startswith(str(settings.BASE_DIR)):
+        return os.path.relpath(filename, settings.BASE_DIR)
+    _, found, rest = filename.rpartition('site-packages' + os.sep)
+    return rest if found else os.path.basename(filename)
+
+
+def frame_label(code):
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f'{name} ({short_path(code.co_filename)}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """Counts the stacks of one thread, read from a background thread"""
+
+    def __init__(self, interval, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if labels:
+                self.stacks[';'.join(reversed(labels))] += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class RequestProfile:
+    """Profiles the block it wraps; ``save`` stores the result"""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.sampler = StackSampler(settings.PROFILING_INTERVAL)
+        self.profiler = cProfile.Profile() if mode == 'requested' else None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.sampler.start()
+        if self.profiler is not None:
+            try:
+                self.profiler.enable()
+            except ValueError:
+                # Another profiler (a debugger, coverage) owns the hooks
+                self.profiler = None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self.start
+
+    def save(self, request, response):
+        global _saved
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        now = timezone.now()
+        profile_id = f'{now:%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}'
+        base = os.path.join(settings.PROFILING_DIR, profile_id)
+
+        with open(f'{base}.collapsed', 'w') as f:
+            f.write(self.sampler.collapsed())
+        if self.profiler is not None:
+            self.profiler.dump_stats(f'{base}.pstats')
+
+        match = request.resolver_match
+        metadata = {
+            'id': profile_id,
+            'time': now.isoformat(),
+            'endpoint': match.view_name if match else 'unmatched',
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'mode': self.mode,
+            'duration_ms': round(self.duration * 1000, 2),
+            'samples': sum(self.sampler.stacks.values()),
+            'files': ['collapsed'] + (['pstats'] if self.profiler is not None else []),
+        }
+        # Written last: a profile is listed once its files are complete
+        with open(f'{base}.json', 'w') as f:
+            json.dump(metadata, f)
+        _saved += 1
+        if _saved % PRUNE_EVERY == 0:
+            prune()
+        return metadata
+
+
+def prune():
+    """Delete the oldest profiles beyond PROFILING_MAX_PROFILES"""
+    ids = sorted(name[:-5] for name in os.listdir(settings.PROFILING_DIR) if name.endswith('.json'))
+    for profile_id in ids[:-settings.PROFILING_MAX_PROFILES or None]:
+        for extension in ('json', 'pstats', 'collapsed'):
+            try:
+                os.remove(os.path.join(settings.PROFILING_DIR, f'{profile_id}.{extension}'))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    """{endpoint: [metadata, newest first]}, endpoints by name"""
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return {}
+    profiles = {}
+    for name in sorted(os.listdir(settings.PROFILING_DIR), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(settings.PROFILING_DIR, name)) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            continue
+        profiles.setdefault(metadata['endpoint'], []).append(metadata)
+    return dict(sorted(profiles.items()))
+
+
+def profile_path(filename):
+    """Path of a stored profile file, or None for a name that isn't one"""
+    if not PROFILE_FILE.match(filename):
+        return None
+    path = os.path.join(settings.PROFILING_DIR, filename)
+    return path if os.path.exists(path) else None
@@ -0,0 +1,215 @@
+from django.apps import apps as global_apps
+from django.core import checks
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+
+# Models backed by an FTS5 shadow table: model label -> indexed columns.
+# The tables are created by migration 0004 and kept in sync by SQLite
+# triggers, so save(), delete() and queryset.update() all update the index.
+# The columns must match the search_fields of the API views searching the
+# model; check_fts_columns reports any drift at startup. A migration that
+# rebuilds a content table drops its triggers: restore_missing_triggers puts
+# them back after every migrate, and check_fts_triggers warns while they are
+# missing.
+FTS_INDEXES = {
+    'pet_adoption.Pet': ['name', 'breed', 'description'],
+    'pet_adoption.Contact': ['name', 'email', 'message'],
+    'pet_adoption.Volunteer': ['first_name', 'last_name', 'email'],
+}
+
+
+def fts_table_name(content_table):
+    return f'{content_table}_fts'
+
+
+def create_fts_index(cursor, content_table, columns):
+    """Create an external-content FTS5 table and the triggers that maintain it"""
+    table = fts_table_name(content_table)
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        f"{column_list}, content='{content_table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {content_table} BEGIN "
+        f"INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {content_table} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+    )
+    # Only fire when an indexed column changes, so status-only bulk updates stay cheap.
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {column_list} ON {content_table} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+    )
+
+
+def fts_trigger_names(content_table):
+    table = fts_table_name(content_table)
+    return [f'{table}_{suffix}' for suffix in ('ai', 'ad', 'au')]
+
+
+def missing_fts_triggers(cursor, content_table):
+    """Names of the FTS triggers missing on ``content_table``; None when it has no FTS table"""
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s",
+        [fts_table_name(content_table)],
+    )
+    if cursor.fetchone() is None:
+        return None
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+        [content_table],
+    )
+    found = {name for name, in cursor.fetchall()}
+    return [name for name in fts_trigger_names(content_table) if name not in found]
+
+
+def drop_fts_index(cursor, content_table):
+    for trigger in fts_trigger_names(content_table):
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    cursor.execute(f'DROP TABLE IF EXISTS {fts_table_name(content_table)}')
+
+
+def rebuild_fts_index(cursor, content_table):
+    """Repopulate an FTS5 table from its content table"""
+    table = fts_table_name(content_table)
+    cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+    cursor.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+
+
+def restore_fts_index(cursor, content_table, columns):
+    """
+    Recreate missing triggers and repopulate the index. SQLite schema changes
+    that rebuild the content table drop its triggers, so migrations run this
+    after any such change.
+    """
+    create_fts_index(cursor, content_table, columns)
+    rebuild_fts_index(cursor, content_table)
+
+
+def restore_missing_triggers(using=DEFAULT_DB_ALIAS, **kwargs):
+    """post_migrate handler: restore the FTS indexes whose triggers a migration dropped"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for label, columns in FTS_INDEXES.items():
+            content_table = global_apps.get_model(label)._meta.db_table
+            if missing_fts_triggers(cursor, content_table):
+                restore_fts_index(cursor, content_table, columns)
+
+
+def is_indexed(model):
+    return connection.vendor == 'sqlite' and model._meta.label in FTS_INDEXES
+
+
+def build_match_query(terms):
+    """Quote each term as an FTS5 prefix query; terms are implicitly AND'ed"""
+    quoted = []
+    for term in terms:
+        term = term.replace('"', '""').strip()
+        if term:
+            quoted.append(f'"{term}"*')
+    return ' '.join(quoted)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for SearchFilter backed by SQLite FTS5.
+
+    For models listed in FTS_INDEXES the search terms are matched as token
+    prefixes against the shadow table and results are annotated with the
+    bm25 ``search_rank``, best match first. Other models, and non-SQLite
+    databases, fall back to the regular icontains search.
+    """
+    rank_annotation = 'search_rank'
+
+    def filter_queryset(self, request, queryset, view):
+        if not is_indexed(queryset.model):
+            return super().filter_queryset(request, queryset, view)
+
+        match = build_match_query(self.get_search_terms(request))
+        if not match:
+            return queryset
+
+        content_table = queryset.model._meta.db_table
+        table = fts_table_name(content_table)
+        quote = connection.ops.quote_name
+        # Join the shadow table once: MATCH runs a single time and each row
+        # reads its rank from the joined match instead of a subquery
+        joined = queryset.extra(
+            tables=[table],
+            where=[
+                f'{quote(table)} MATCH %s',
+                f'{quote(table)}.rowid = {quote(content_table)}.{quote("id")}',
+            ],
+            params=[match],
+        )
+        return joined.annotate(
+            **{self.rank_annotation: RawSQL(f'{quote(table)}.rank', [])}
+        ).order_by(self.rank_annotation, '-pk')
+
+
+def check_fts_columns(app_configs, **kwargs):
+    """FullTextSearchFilter views must search exactly their model's indexed columns"""
+    from .api_urls import router
+
+    errors = []
+    for prefix, viewset, basename in router.registry:
+        label = viewset.queryset.model._meta.label
+        if FullTextSearchFilter not in viewset.filter_backends or label not in FTS_INDEXES:
+            continue
+        search_fields = [field.lstrip('^=@$') for field in viewset.search_fields]
+        if sorted(search_fields) != sorted(FTS_INDEXES[label]):
+            errors.append(checks.Error(
+                f'{viewset.__name__}.search_fields {search_fields} do not match the '
+                f'columns indexed for {label} {FTS_INDEXES[label]}.',
+                hint='Update FTS_INDEXES and add a migration rebuilding the FTS table, '
+                     'or change search_fields.',
+                obj=viewset,
+                id='pet_adoption.E001',
+            ))
+    return errors
+
+
+def check_fts_triggers(app_configs, databases=None, **kwargs):
+    """Every FTS index must still have the triggers that keep it current"""
+    errors = []
+    for alias in databases or []:
+        if connections[alias].vendor != 'sqlite':
+            continue
+        with connections[alias].cursor() as cursor:
+            for label in FTS_INDEXES:
+                content_table = global_apps.get_model(label)._meta.db_table
+                missing = missing_fts_triggers(cursor, content_table)
+                if missing:
+                    # A warning: an error would stop the migrate that restores them
+                    errors.append(checks.Warning(
+                        f'The search index of {label} is missing its triggers '
+                        f'{", ".join(missing)} in database {alias!r}, so changes no longer reach it.',
+                        hint='Run migrate, which restores them, or rebuild_search_index.',
+                        id='pet_adoption.W001',
+                    ))
+    return errors
+
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that keeps FullTextSearchFilter's relevance ordering
+    unless the client asked for an explicit ``?ordering=``.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params and FullTextSearchFilter.rank_annotation in queryset.query.annotations:
+            return None
+        return super().get_ordering(request, queryset, view)
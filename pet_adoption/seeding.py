@@ -0,0 +1,98 @@
+import random
+from decimal import Decimal
+
+from .models import Pet, Adoption, Contact, Volunteer, Donation, NewsletterSubscription
+
+
+def _choice(choices, rng):
+    return rng.choice(choices)[0]
+
+
+def seed_database(rows, seed=0, batch_size=500):
+    """
+    Insert ``rows`` synthetic rows for every pet_adoption model.
+
+    Values are drawn from each model's choices with a fixed random seed so
+    repeated runs produce the same data distribution. Returns a dict of
+    model name -> number of rows created.
+    """
+    rng = random.Random(seed)
+    words = ['friendly', 'playful', 'calm', 'curious', 'loyal', 'gentle', 'shy', 'energetic']
+
+    Pet.objects.bulk_create([
+        Pet(
+            name=f'Pet {i}',
+            pet_type=_choice(Pet.PET_TYPE_CHOICES, rng),
+            breed=rng.choice(['Labrador', 'Beagle', 'Siamese', 'Persian', 'Lop', None]),
+            age=_choice(Pet.AGE_CHOICES, rng),
+            gender=_choice(Pet.GENDER_CHOICES, rng),
+            is_vaccinated=rng.random() < 0.7,
+            is_neutered_spayed=rng.random() < 0.5,
+            status=_choice(Pet.STATUS_CHOICES, rng),
+            description=' '.join(rng.choice(words) for _ in range(40)),
+        )
+        for i in range(rows)
+    ], batch_size=batch_size)
+    pet_ids = list(Pet.objects.values_list('id', flat=True))
+
+    Adoption.objects.bulk_create([
+        Adoption(
+            adopter_name=f'Adopter {i}',
+            adopter_email=f'adopter{i}@example.com',
+            adopter_phone='555-0100',
+            pet_id=rng.choice(pet_ids),
+            status=_choice(Adoption.STATUS_CHOICES, rng),
+            reason_for_adoption=' '.join(rng.choice(words) for _ in range(30)),
+        )
+        for i in range(rows)
+    ], batch_size=batch_size)
+
+    Contact.objects.bulk_create([
+        Contact(
+            name=f'Contact {i}',
+            email=f'contact{i}@example.com',
+            subject=_choice(Contact.SUBJECT_CHOICES, rng),
+            message=' '.join(rng.choice(words) for _ in range(50)),
+            is_read=rng.random() < 0.5,
+        )
+        for i in range(rows)
+    ], batch_size=batch_size)
+
+    Volunteer.objects.bulk_create([
+        Volunteer(
+            first_name=f'First{i}',
+            last_name=f'Last{i}',
+            email=f'volunteer{i}@example.com',
+            phone='555-0100',
+            roles='walking,feeding',
+            weekly_hours=rng.choice(['2-5', '5-10', '10+']),
+            motivation=' '.join(rng.choice(words) for _ in range(30)),
+            status=_choice(Volunteer.STATUS_CHOICES, rng),
+        )
+        for i in range(rows)
+    ], batch_size=batch_size)
+
+    Donation.objects.bulk_create([
+        Donation(
+            donor_name=f'Donor {i}',
+            donor_email=f'donor{i}@example.com',
+            amount=Decimal(rng.choice([25, 50, 100, rng.randint(5, 500)])),
+            is_custom=rng.random() < 0.3,
+            is_anonymous=rng.random() < 0.2,
+            payment_status=_choice(Donation.PAYMENT_STATUS_CHOICES, rng),
+        )
+        for i in range(rows)
+    ], batch_size=batch_size)
+
+    NewsletterSubscription.objects.bulk_create([
+        NewsletterSubscription(
+            email=f'subscriber{i}@example.com',
+            is_active=rng.random() < 0.8,
+        )
+        for i in range(rows)
+    ], batch_size=batch_size)
+
+    return {
+        model.__name__: rows
+        for model in (Pet, Adoption, Contact, Volunteer, Donation, NewsletterSubscription)
+    }
@@ -1,32 +1,245 @@
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import Pet, Adoption, Contact, Volunteer, Donation, NewsletterSubscription
+from rest_framework.exceptions import ValidationError
+from . import metrics, uploads
+from .models import Pet, Adoption, Contact, Volunteer, Donation, NewsletterSubscription, ImageUpload
+
 
+class RowSerializerMixin:
+    """
+    Lets a flat serializer also serialize dicts from ``QuerySet.values()``,
+    with output identical to serializing model instances.
+    
+    ``row_columns()`` names the columns to fetch, and ``to_rows()`` converts
+    a batch of rows with per-field converters built once per batch: plain
+    fields call their own ``to_representation`` on the column value, file
+    fields build the storage URL, primary key related fields pass the key
+    through, and nested RowSerializerMixin serializers read the columns of
+    the related model (``pet__name``). A field may instead declare
+    ``row_columns`` and implement ``to_row_representation(row)``.
+    SerializerMethodFields are called with an object carrying the row's
+    columns as attributes, so ``Meta.method_columns`` must name the columns
+    each method reads.
+    
+    Both paths count towards the request's serialization time.
+    """
+    
+    def to_representation(self, instance):
+        with metrics.timed('serialize'):
+            return super().to_representation(instance)
+    
+    def row_columns(self):
+        columns = []
+        for field in self._readable_fields:
+            for column in self._field_columns(field):
+                if column not in columns:
+                    columns.append(column)
+        return columns
+    
+    def to_rows(self, rows):
+        with metrics.timed('serialize'):
+            converters = self.row_converters()
+            return [{name: convert(row) for name, convert in converters} for row in rows]
+    
+    def row_converters(self):
+        return [(field.field_name, self._row_converter(field)) for field in self._readable_fields]
+    
+    def _field_columns(self, field):
+        if isinstance(field, RowSerializerMixin):
+            prefix = '__'.join(field.source_attrs)
+            pk_name = field.Meta.model._meta.pk.name
+            return [f'{prefix}__{column}' for column in [pk_name, *field.row_columns()]]
+        if hasattr(field, 'row_columns'):
+            return field.row_columns
+        if isinstance(field, serializers.SerializerMethodField):
+            return self.Meta.method_columns[field.field_name]
+        return ['__'.join(field.source_attrs)]
+    
+    def _row_converter(self, field):
+        if isinstance(field, RowSerializerMixin):
+            return self._nested_converter(field)
+        if hasattr(field, 'to_row_representation'):
+            return field.to_row_representation
+        if isinstance(field, serializers.SerializerMethodField):
+            method = getattr(self, field.method_name)
+            return lambda row: method(SimpleNamespace(**row))
+        
+        column = '__'.join(field.source_attrs)
+        if isinstance(field, serializers.FileField):
+            convert = self._file_converter(field)
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            convert = field.pk_field.to_representation if field.pk_field else (lambda pk: pk)
+        elif isinstance(field, serializers.RelatedField):
+            raise ImproperlyConfigured(f'{type(self).__name__}.{field.field_name} cannot be serialized from rows')
+        else:
+            convert = field.to_representation
+        
+        def converter(row):
+            value = row[column]
+            return None if value is None else convert(value)
+        return converter
+    
+    def _nested_converter(self, field):
+        prefix = '__'.join(field.source_attrs) + '__'
+        pk_column = prefix + field.Meta.model._meta.pk.name
+        columns = field.row_columns()
+        converters = field.row_converters()
+        
+        def converter(row):
+            if row[pk_column] is None:
+                return None
+            nested = {column: row[prefix + column] for column in columns}
+            return {name: convert(nested) for name, convert in converters}
+        return converter
+    
+    def _file_converter(self, field):
+        """Same output as FileField.to_representation, from the stored name"""
+        model = self.Meta.model
+        for attr in field.source_attrs[:-1]:
+            model = model._meta.get_field(attr).related_model
+        storage = model._meta.get_field(field.source_attrs[-1]).storage
+        request = field.context.get('request')
+        use_url = getattr(field, 'use_url', True)
+        
+        def convert(name):
+            if not name:
+                return None
+            if not use_url:
+                return name
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return convert
+
+
+def split_paths(paths):
+    """
+    ['id', 'pet_details.name'] -> ({'id', 'pet_details'}, {'pet_details': ['name']}).
+    A name listed on its own selects all of its nested fields.
+    """
+    if paths is None:
+        return None, {}
+    names, nested, whole = set(), {}, set()
+    for path in paths:
+        name, _, rest = path.partition('.')
+        names.add(name)
+        if rest:
+            nested.setdefault(name, []).append(rest)
+        else:
+            whole.add(name)
+    for name in whole:
+        nested.pop(name, None)
+    return names, nested
+
+
+class SparseFieldsetMixin:
+    """
+    ``fields`` and ``expand`` keyword arguments, which the views fill from
+    ``?fields=`` and ``?expand=``: lists of field names, where dotted names
+    (``pet_details.name``) reach into nested serializers.
+    
+    ``fields`` keeps only the named fields. ``Meta.expandable_fields`` maps
+    names to ``(serializer class, keyword arguments)`` of nested serializers
+    that are only included when named in ``expand`` or ``fields``. Unknown
+    names are a validation error.
+    """
+    
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested_fields = fields
+        self.requested_expand = expand or []
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        selected, nested_fields = split_paths(self.requested_fields)
+        expanded, nested_expand = split_paths(self.requested_expand)
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        
+        unknown_expand = expanded - set(expandable) - set(fields)
+        if unknown_expand:
+            raise ValidationError({'expand': f'Unknown field(s): {", ".join(sorted(unknown_expand))}'})
+        for name, (serializer_class, options) in expandable.items():
+            if name in expanded or (selected is not None and name in selected):
+                fields[name] = serializer_class(read_only=True, **options)
+        
+        if selected is not None:
+            unknown = selected - set(fields)
+            if unknown:
+                raise ValidationError({'fields': f'Unknown field(s): {", ".join(sorted(unknown))}'})
+            fields = {name: field for name, field in fields.items() if name in selected}
+        
+        for name, field in fields.items():
+            if isinstance(field, SparseFieldsetMixin):
+                field.requested_fields = nested_fields.get(name)
+                field.requested_expand = nested_expand.get(name, [])
+        return fields
 
-class PetSerializer(serializers.ModelSerializer):
+
+class ImageSrcsetField(serializers.Field):
+    """Read-only {'webp': srcset, 'jpeg': srcset} of a pet's resized images, or None"""
+    
+    row_columns = ['image', 'image_variants']
+    
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def to_representation(self, pet):
+        if not pet.has_image_variants():
+            return None
+        return self.srcsets(pet.image_variants)
+    
+    def to_row_representation(self, row):
+        # Same test as Pet.has_image_variants, without building a Pet
+        image = row['image']
+        if not image or row['image_variants'].get('source') != image:
+            return None
+        return self.srcsets(row['image_variants'])
+    
+    def srcsets(self, image_variants):
+        request = self.context.get('request')
+        
+        def url(name):
+            url = default_storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        
+        return {
+            image_format: Pet.variants_srcset(image_variants, image_format, url)
+            for image_format in ('webp', 'jpeg')
+        }
+
+
+class PetSerializer(SparseFieldsetMixin, RowSerializerMixin, serializers.ModelSerializer):
     """Serializer for Pet model with all fields"""
+    image_srcset = ImageSrcsetField()
     
     class Meta:
         model = Pet
         fields = [
             'id', 'name', 'pet_type', 'breed', 'age', 'gender',
             'is_vaccinated', 'is_neutered_spayed', 'health_status',
-            'status', 'description', 'image', 'created_at', 'updated_at'
+            'status', 'description', 'image', 'image_srcset', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class PetListSerializer(serializers.ModelSerializer):
+class PetListSerializer(SparseFieldsetMixin, RowSerializerMixin, serializers.ModelSerializer):
     """Serializer for Pet list view - limited fields for performance"""
+    image_srcset = ImageSrcsetField()
     
     class Meta:
         model = Pet
         fields = [
             'id', 'name', 'pet_type', 'age', 'gender',
-            'status', 'image'
+            'status', 'image', 'image_srcset'
         ]
 
 
-class AdoptionSerializer(serializers.ModelSerializer):
+class AdoptionSerializer(SparseFieldsetMixin, RowSerializerMixin, serializers.ModelSerializer):
     """Serializer for Adoption model with nested Pet data"""
     pet_details = PetListSerializer(source='pet', read_only=True)
     
@@ -41,7 +254,7 @@ class AdoptionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'applied_at', 'approved_at', 'completed_at', 'updated_at']
 
 
-class AdoptionListSerializer(serializers.ModelSerializer):
+class AdoptionListSerializer(SparseFieldsetMixin, RowSerializerMixin, serializers.ModelSerializer):
     """Serializer for Adoption list view - limited fields"""
     pet_name = serializers.CharField(source='pet.name', read_only=True)
     pet_type = serializers.CharField(source='pet.pet_type', read_only=True)
@@ -52,9 +265,12 @@ class AdoptionListSerializer(serializers.ModelSerializer):
             'id', 'adopter_name', 'pet', 'pet_name', 'pet_type',
             'status', 'applied_at'
         ]
+        expandable_fields = {
+            'pet_details': (PetListSerializer, {'source': 'pet'}),
+        }
 
 
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(SparseFieldsetMixin, RowSerializerMixin, serializers.ModelSerializer):
     """Serializer for Contact form submissions"""
     
     class Meta:
@@ -66,7 +282,7 @@ class ContactSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class VolunteerSerializer(serializers.ModelSerializer):
+class VolunteerSerializer(SparseFieldsetMixin, RowSerializerMixin, serializers.ModelSerializer):
     """Serializer for Volunteer model"""
     
     class Meta:
@@ -79,7 +295,7 @@ class VolunteerSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'applied_at', 'updated_at']
 
 
-class VolunteerListSerializer(serializers.ModelSerializer):
+class VolunteerListSerializer(SparseFieldsetMixin, RowSerializerMixin, serializers.ModelSerializer):
     """Serializer for Volunteer list view"""
     
     full_name = serializers.SerializerMethodField()
@@ -89,12 +305,13 @@ class VolunteerListSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'full_name', 'email', 'status', 'applied_at'
         ]
+        method_columns = {'full_name': ['first_name', 'last_name']}
     
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}"
 
 
-class DonationSerializer(serializers.ModelSerializer):
+class DonationSerializer(SparseFieldsetMixin, RowSerializerMixin, serializers.ModelSerializer):
     """Serializer for Donation model"""
     
     class Meta:
@@ -107,7 +324,7 @@ class DonationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'completed_at']
 
 
-class DonationListSerializer(serializers.ModelSerializer):
+class DonationListSerializer(SparseFieldsetMixin, RowSerializerMixin, serializers.ModelSerializer):
     """Serializer for Donation list view"""
     
     class Meta:
@@ -117,7 +334,7 @@ class DonationListSerializer(serializers.ModelSerializer):
         ]
 
 
-class NewsletterSubscriptionSerializer(serializers.ModelSerializer):
+class NewsletterSubscriptionSerializer(SparseFieldsetMixin, RowSerializerMixin, serializers.ModelSerializer):
     """Serializer for Newsletter Subscription"""
     
     class Meta:
@@ -126,3 +343,30 @@ class NewsletterSubscriptionSerializer(serializers.ModelSerializer):
             'id', 'email', 'subscribed_at', 'is_active'
         ]
         read_only_fields = ['id', 'subscribed_at']
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+    """Serializer for chunked pet image uploads; offset is the number of bytes received"""
+    
+    offset = serializers.SerializerMethodField()
+    chunk_size = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ImageUpload
+        fields = [
+            'id', 'pet', 'filename', 'size', 'offset', 'chunk_size', 'created_at'
+        ]
+        read_only_fields = ['id', 'created_at']
+    
+    def get_offset(self, obj):
+        return uploads.received(obj)
+    
+    def get_chunk_size(self, obj):
+        return settings.CHUNKED_UPLOAD_CHUNK_SIZE
+    
+    def validate_size(self, value):
+        if not 0 < value <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Must be between 1 and {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes"
+            )
+        return value
@@ -0,0 +1,90 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache, donation_stats, images
+from .backups import record_changes
+from .models import Adoption, Contact, Donation, NewsletterSubscription, Pet, Volunteer
+
+
+@receiver([post_save, post_delete], sender=Pet)
+def invalidate_pet_cache(sender, **kwargs):
+    """Drop cached pet responses once a pet save or delete commits"""
+    # Invalidating before the commit would let a concurrent request cache
+    # the old rows again under the new generation
+    transaction.on_commit(lambda: cache.invalidate(cache.PETS))
+
+
+@receiver(post_save, sender=Pet)
+def refresh_image_variants(sender, instance, raw=False, **kwargs):
+    """Render resized copies of a new image once the save has committed"""
+    if raw:
+        return
+    if instance.image and not instance.has_image_variants():
+        transaction.on_commit(lambda: images.schedule_variants(instance))
+    elif not instance.image and instance.image_variants:
+        Pet.objects.filter(pk=instance.pk).update(image_variants={})
+
+
+@receiver(pre_save, sender=Donation)
+def remember_donation_state(sender, instance, raw=False, **kwargs):
+    """Read the stored row so post_save can diff it against the new state"""
+    instance._previous_state = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_state = Donation.objects.filter(pk=instance.pk).values(
+        'payment_status', 'amount', 'created_at', 'is_custom', 'is_anonymous'
+    ).first()
+
+
+@receiver(post_save, sender=Donation)
+def update_donation_totals(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_state', None)
+    old = None
+    if previous is not None:
+        old = donation_stats.contribution(
+            previous['payment_status'], previous['amount'], previous['created_at']
+        )
+    new = donation_stats.contribution(instance.payment_status, instance.amount, instance.created_at)
+    donation_stats.apply_transition(old, new)
+
+    # New donations land at or after the rollup watermark; edits to existing
+    # ones may touch an hour that was already rolled up.
+    flags_changed = previous is not None and (
+        previous['is_custom'] != instance.is_custom
+        or previous['is_anonymous'] != instance.is_anonymous
+    )
+    if old != new or (flags_changed and (old or new)):
+        if previous is not None:
+            donation_stats.mark_rollup_stale(instance.created_at, instance.is_custom, instance.is_anonymous)
+        donation_stats.schedule_rollup_refresh()
+
+
+@receiver(post_delete, sender=Donation)
+def remove_donation_totals(sender, instance, **kwargs):
+    old = donation_stats.contribution(instance.payment_status, instance.amount, instance.created_at)
+    if old is not None:
+        donation_stats.apply_transition(old, None)
+        donation_stats.mark_rollup_stale(instance.created_at, instance.is_custom, instance.is_anonymous)
+        donation_stats.schedule_rollup_refresh()
+
+
+@receiver(post_save, sender=Donation)
+@receiver(post_save, sender=NewsletterSubscription)
+def record_tracked_save(sender, instance, raw=False, **kwargs):
+    """These models have no updated_at, so incremental backups find their changes here"""
+    if raw:
+        return
+    record_changes(sender, [instance.pk], 'save')
+
+
+@receiver(post_delete, sender=Pet)
+@receiver(post_delete, sender=Adoption)
+@receiver(post_delete, sender=Contact)
+@receiver(post_delete, sender=Volunteer)
+@receiver(post_delete, sender=Donation)
+@receiver(post_delete, sender=NewsletterSubscription)
+def record_deletion(sender, instance, **kwargs):
+    record_changes(sender, [instance.pk], 'delete')
@@ -0,0 +1,113 @@
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Slow query log.
+#
+# SlowQueryMiddleware wraps every statement a request runs; one taking
+# SLOW_QUERY_THRESHOLD_MS or longer is appended to SLOW_QUERY_LOG as a JSON
+# line with the view (and viewset action) that ran it, its SQL with literals
+# replaced by ?, a fingerprint of that normalized SQL, and SQLite's EXPLAIN
+# QUERY PLAN. Parameters are never logged. The slow_query_report command
+# summarizes the log per fingerprint.
+
+_origin = contextvars.ContextVar('slow_query_origin', default=None)
+_explaining = contextvars.ContextVar('slow_query_explaining', default=False)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """``sql`` with literals and placeholders as ?, and IN lists of any length alike"""
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = PLACEHOLDER_LIST.sub('(?)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.md5(normalized_sql.encode('utf-8')).hexdigest()[:12]
+
+
+def view_origin(request, view_func):
+    """``PetViewSet.list`` for a viewset action, the function name for a plain view"""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', repr(view_func))
+    action = (getattr(view_func, 'actions', None) or {}).get(request.method.lower())
+    return f'{cls.__name__}.{action}' if action else cls.__name__
+
+
+def set_origin(origin):
+    return _origin.set(origin)
+
+
+def reset_origin(token):
+    _origin.reset(token)
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    """Connection execute wrapper logging statements over the threshold"""
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - start) * 1000
+    if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS and not _explaining.get():
+        record(context['connection'], sql, params, many, duration_ms)
+    return result
+
+
+def explain(connection, sql, params, many):
+    """The query plan of ``sql`` as a list of lines, or None when unavailable"""
+    if many or connection.vendor != 'sqlite':
+        return None
+    token = _explaining.set(True)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            rows = cursor.fetchall()
+    except DatabaseError:
+        return None
+    finally:
+        _explaining.reset(token)
+    # Rows are (id, parent, unused, detail); indent children under parents
+    depth = {0: -1}
+    plan = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        plan.append(f'{"  " * depth[node]}{detail}')
+    return plan
+
+
+def record(connection, sql, params, many, duration_ms):
+    normalized = normalize(sql)
+    entry = {
+        'time': timezone.now().isoformat(),
+        'duration_ms': round(duration_ms, 2),
+        'origin': _origin.get() or 'no request',
+        'fingerprint': fingerprint(normalized),
+        'sql': normalized,
+        'plan': explain(connection, sql, params, many),
+    }
+    logger.warning('Slow query (%.1f ms) in %s: %s', duration_ms, entry['origin'], normalized[:200])
+    path = settings.SLOW_QUERY_LOG
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # One write on an O_APPEND descriptor, so lines of concurrent workers never interleave
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, (json.dumps(entry) + '\n').encode('utf-8'))
+    finally:
+        os.close(fd)
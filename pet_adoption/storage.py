@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import os
+import re
+
+import rcssmin
+import rjsmin
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+CONTENT_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.|$)')
+
+
+def is_content_addressed(name):
+    return bool(CONTENT_NAME.search(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File storage that names every file after the sha256 of its content:
+    ``<upload dir>/<first two hex digits>/<sha256><ext>``.
+
+    Uploading a file that is already stored returns the existing name without
+    writing anything (only its mtime is bumped, for gc_media), so re-uploads
+    of the same photo share one file, and a name always refers to the same
+    bytes, which lets nginx cache it forever.
+    """
+
+    def __init__(self, **kwargs):
+        # Two uploads of the same content may race to write the same name;
+        # either copy is correct, so don't fall back to a suffixed name.
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+
+    def content_name(self, name, content):
+        sha256 = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        digest = sha256.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], f'{digest}{extension}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        try:
+            # Restart gc_media's grace period: the file is about to be
+            # referenced again, possibly after it was orphaned
+            os.utime(self.path(name))
+            return name
+        except FileNotFoundError:
+            return super().save(name, content, max_length=max_length)
+
+    def save_derived(self, name, content):
+        """
+        Store a file derived from a content-addressed one (a resized copy)
+        under exactly ``name``. Renders of the same source are identical, so
+        a concurrent write of the same name is simply overwritten.
+        """
+        return super().save(name, content)
+
+
+pet_image_storage = ContentAddressedStorage()
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Static files storage for nginx: at collectstatic time CSS and JS are
+    minified, every file gets a content-hashed copy listed in the manifest,
+    and text files get precompressed ``.gz`` (and ``.br`` when the brotli
+    package is installed) siblings for ``gzip_static``.
+    """
+    minifiers = {
+        '.css': rcssmin.cssmin,
+        '.js': rjsmin.jsmin,
+    }
+    manifest_strict = False
+    compressible_extensions = ('.css', '.js', '.svg', '.txt', '.json', '.map', '.xml', '.html')
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        paths = dict(paths)
+        for name, (storage, path) in list(paths.items()):
+            minify = self.minifiers.get(os.path.splitext(name)[1])
+            if minify is None or re.search(r'\.min\.\w+$', name):
+                continue
+            with storage.open(path) as original_file:
+                content = original_file.read().decode('utf-8')
+            self.replace(name, minify(content).encode('utf-8'))
+            # Hash and rewrite the minified copy rather than the source
+            paths[name] = (self, name)
+
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if hashed_name and not isinstance(processed, Exception):
+                processed_names.update((name, hashed_name))
+
+        # Last, so the compressed copies match the final rewritten files
+        for name in sorted(processed_names):
+            if name.endswith(self.compressible_extensions):
+                self.precompress(name)
+
+    def precompress(self, name):
+        with self.open(name) as f:
+            content = f.read()
+        compressors = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            compressors.append(('.br', lambda data: brotli.compress(data, quality=11)))
+        for suffix, compress in compressors:
+            compressed = compress(content)
+            if len(compressed) < len(content):
+                self.replace(name + suffix, compressed)
+
+    def replace(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+
+    def hashed_name(self, name, content=None, filename=None):
+        # A reference to a file that isn't shipped, from a stylesheet or a
+        # template, keeps its plain URL (and 404s) instead of failing
+        # collectstatic or the page render.
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if content is not None:
+                raise
+            return name
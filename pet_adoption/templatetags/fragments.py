@@ -0,0 +1,59 @@
+import time
+
+from django import template
+from django.conf import settings
+
+from pet_adoption import rendering
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on, cached):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+        self.cached = cached
+
+    def render(self, context):
+        start = time.perf_counter()
+        if not self.cached:
+            value = self.nodelist.render(context)
+            status = 'uncached'
+        else:
+            fragment_cache = rendering.fragment_cache()
+            key = rendering.fragment_key(self.name, [var.resolve(context) for var in self.vary_on])
+            value = fragment_cache.get(key)
+            status = 'hit'
+            if value is None:
+                value = self.nodelist.render(context)
+                fragment_cache.set(key, value, settings.TEMPLATE_FRAGMENT_TIMEOUT)
+                status = 'miss'
+        rendering.record(context.get('request'), self.name, time.perf_counter() - start, status)
+        return value
+
+
+@register.tag
+def fragment(parser, token):
+    """
+    Cache and time the enclosed template fragment:
+
+        {% fragment "hero" %} ... {% endfragment %}
+        {% fragment "pet-grid" featured_version %} ... {% endfragment %}
+        {% fragment "donation-form" uncached %} ... {% endfragment %}
+
+    The cache key varies on the template version and on any variables given
+    after the name. ``uncached`` only times the fragment; use it for anything
+    that holds per-visitor content such as a CSRF token.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    name = bits[1].strip('"\'')
+    cached = bits[-1] != 'uncached'
+    vary_on = bits[2:] if cached else bits[2:-1]
+    if not cached and vary_on:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag cannot vary an uncached fragment")
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(nodelist, name, [parser.compile_filter(var) for var in vary_on], cached)
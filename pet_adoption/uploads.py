@@ -0,0 +1,141 @@
+import fcntl
+import os
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files import File
+from PIL import Image
+
+# Resumable chunked uploads of pet images.
+#
+# Each ImageUpload appends its chunks to <CHUNKED_UPLOAD_DIR>/<id>.part,
+# streamed from the request in small reads, so neither a chunk nor the image
+# is ever held in memory. The size of the part file is the offset a client
+# resumes from after a disconnect: whatever reached the disk before the
+# connection dropped is kept. A chunk must start exactly at that offset, and
+# an exclusive flock on the part file keeps two requests for the same upload
+# from writing at once.
+
+READ_SIZE = 64 * 1024
+
+# Pillow format -> extension the stored image gets
+IMAGE_FORMATS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'WEBP': '.webp',
+}
+
+
+class UploadBusy(Exception):
+    """Another request is writing to or finalizing the same upload"""
+
+
+class OffsetMismatch(Exception):
+    """A chunk does not start where the received bytes end"""
+
+    def __init__(self, offset):
+        super().__init__(f'Upload is at offset {offset}')
+        self.offset = offset
+
+
+class TemporaryFile(File):
+    """A file on disk that FileSystemStorage may move into place instead of copying"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def part_path(upload):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{upload.pk}.part')
+
+
+def received(upload):
+    """Bytes of ``upload`` on disk so far"""
+    try:
+        return os.path.getsize(part_path(upload))
+    except FileNotFoundError:
+        return 0
+
+
+@contextmanager
+def locked(upload):
+    """Open the part file of ``upload`` under an exclusive lock; yields its descriptor"""
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    fd = os.open(part_path(upload), os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadBusy('Another request is writing to this upload')
+        yield fd
+    finally:
+        os.close(fd)
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Append ``length`` bytes read from ``stream`` at ``offset`` and return the
+    new offset. If the client disconnects midway, the bytes read until then
+    stay on disk and the error propagates.
+    """
+    with locked(upload) as fd:
+        current = os.fstat(fd).st_size
+        if offset != current:
+            raise OffsetMismatch(current)
+        if current + length > upload.size:
+            raise ValueError(f'Chunk would exceed the announced size of {upload.size} bytes')
+        os.lseek(fd, current, os.SEEK_SET)
+        remaining = length
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            os.write(fd, data)
+            remaining -= len(data)
+        return os.fstat(fd).st_size
+
+
+def validate_image(path):
+    """Return the Pillow format of the image at ``path``; ValueError if it is not a supported image"""
+    try:
+        with Image.open(path) as image:
+            image_format = image.format
+            image.verify()
+        # verify() only checks the structure; decoding catches truncated data
+        with Image.open(path) as image:
+            image.load()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ValueError('Not a valid image file') from e
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f'Unsupported image format {image_format}')
+    return image_format
+
+
+def finalize(upload):
+    """
+    Validate the assembled image, attach it to the upload's pet and delete
+    the upload. Returns the pet.
+    """
+    pet = upload.pet
+    path = part_path(upload)
+    with locked(upload) as fd:
+        size = os.fstat(fd).st_size
+        if size != upload.size:
+            raise ValueError(f'Received {size} of {upload.size} bytes')
+        image_format = validate_image(path)
+        stem = os.path.splitext(os.path.basename(upload.filename))[0] or 'image'
+        with open(path, 'rb') as f:
+            pet.image.save(f'{stem}{IMAGE_FORMATS[image_format]}', TemporaryFile(f), save=False)
+        pet.save(update_fields=['image', 'updated_at'])
+        discard(upload)
+    return pet
+
+
+def discard(upload):
+    """Delete ``upload`` and whatever it received"""
+    try:
+        os.remove(part_path(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
@@ -1,29 +1,38 @@
-from rest_framework import viewsets, filters, status
+from datetime import datetime, time, timedelta
+from rest_framework import mixins, viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_date, parse_datetime
 from django.shortcuts import render
-from .models import Pet, Adoption, Contact, Volunteer, Donation, NewsletterSubscription
+from . import cache, donation_stats, metrics, rendering, uploads
+from .facets import facet_counts
+from .cache import cached_response
+from .conditional import ConditionalGetMixin
+from .fieldsets import FieldSelectionMixin
+from .listing import ValuesListMixin
+from .pagination import StandardResultsSetPagination
+from .search import FullTextSearchFilter, RankedOrderingFilter
+from .models import Pet, Adoption, Contact, Volunteer, Donation, NewsletterSubscription, ImageUpload
 from .serializers import (
     PetSerializer, PetListSerializer,
     AdoptionSerializer, AdoptionListSerializer,
     ContactSerializer,
     VolunteerSerializer, VolunteerListSerializer,
     DonationSerializer, DonationListSerializer,
-    NewsletterSubscriptionSerializer
+    NewsletterSubscriptionSerializer,
+    ImageUploadSerializer
 )
 
 
-class StandardResultsSetPagination(PageNumberPagination):
-    """Standard pagination for list views"""
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-
-class PetViewSet(viewsets.ModelViewSet):
+class PetViewSet(ConditionalGetMixin, FieldSelectionMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Pet model.
     
@@ -33,16 +42,19 @@ class PetViewSet(viewsets.ModelViewSet):
     - Search by name
     - Create/Update/Delete pets (admin only)
     - Retrieve single pet details
+    - Select fields with ?fields=
+    - Count pets per filter option for the filter bar
     """
     queryset = Pet.objects.all()
     serializer_class = PetSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['pet_type', 'age', 'gender', 'status']
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RankedOrderingFilter]
+    filterset_fields = ['pet_type', 'age', 'gender', 'status', 'is_vaccinated', 'is_neutered_spayed']
     search_fields = ['name', 'breed', 'description']
     ordering_fields = ['created_at', 'name']
     ordering = ['-created_at']
+    cache_control = {'public': True, 'max_age': 60}
     
     def get_serializer_class(self):
         """Use list serializer for list view"""
@@ -50,7 +62,16 @@ class PetViewSet(viewsets.ModelViewSet):
             return PetListSerializer
         return PetSerializer
     
+    @cached_response(cache.PETS)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    @cached_response(cache.PETS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
     @action(detail=False, methods=['get'])
+    @cached_response(cache.PETS)
     def available(self, request):
         """Get all available pets"""
         available_pets = Pet.objects.filter(status='available')
@@ -63,6 +84,7 @@ class PetViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cached_response(cache.PETS)
     def adopted(self, request):
         """Get all adopted pets"""
         adopted_pets = Pet.objects.filter(status='adopted')
@@ -74,6 +96,26 @@ class PetViewSet(viewsets.ModelViewSet):
         serializer = PetListSerializer(adopted_pets, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    @cached_response(cache.PETS)
+    def facets(self, request):
+        """
+        Get pet counts per value of every filter field, in one query.
+        
+        Takes the same search and filter parameters as the list; each
+        field's counts ignore its own filter, so they show what selecting
+        each option would return.
+        """
+        queryset = FullTextSearchFilter().filter_queryset(request, self.get_queryset(), self)
+        filterset = DjangoFilterBackend().get_filterset(request, queryset, self)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        applied = {
+            name: value for name, value in filterset.form.cleaned_data.items()
+            if value not in (None, '')
+        }
+        return Response(facet_counts(queryset, self.filterset_fields, applied))
+    
     @action(detail=True, methods=['post'])
     def mark_adopted(self, request, pk=None):
         """Mark a pet as adopted"""
@@ -84,9 +126,14 @@ class PetViewSet(viewsets.ModelViewSet):
             {'status': 'Pet marked as adopted'},
             status=status.HTTP_200_OK
         )
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Get hit/miss/evict counters for the pet response cache, summed over all workers"""
+        return Response(cache.get_stats(cache.PETS))
 
 
-class AdoptionViewSet(viewsets.ModelViewSet):
+class AdoptionViewSet(ConditionalGetMixin, FieldSelectionMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Adoption applications.
     
@@ -96,6 +143,7 @@ class AdoptionViewSet(viewsets.ModelViewSet):
     - Create new adoption applications
     - View adoption details
     - Admin can approve/reject applications
+    - Select fields with ?fields=, nest the pet in lists with ?expand=pet_details
     """
     queryset = Adoption.objects.all()
     serializer_class = AdoptionSerializer
@@ -105,6 +153,34 @@ class AdoptionViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'pet_id']
     ordering_fields = ['applied_at', 'status']
     ordering = ['-applied_at']
+    # Responses embed the pet's name, type and details
+    related_updated_at = ['pet__updated_at']
+    
+    # Pet columns read by AdoptionListSerializer and by PetListSerializer
+    # (nested as pet_details in AdoptionSerializer)
+    list_pet_fields = ['pet__name', 'pet__pet_type']
+    detail_pet_fields = [
+        'pet__name', 'pet__pet_type', 'pet__age', 'pet__gender',
+        'pet__status', 'pet__image', 'pet__image_variants'
+    ]
+    
+    def get_queryset(self):
+        """Join the pet in the same query, loading only the columns serialized"""
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            # Columns and the pet join follow ?fields= (see FieldSelectionMixin)
+            return queryset
+        queryset = queryset.select_related('pet')
+        if self.action in ('list', 'pending'):
+            return queryset.only(
+                'id', 'adopter_name', 'pet', 'status', 'applied_at',
+                *self.list_pet_fields
+            )
+        if self.action in ('approve', 'complete'):
+            # The pet is saved by these actions, so load it in full
+            return queryset
+        adoption_fields = [field.name for field in Adoption._meta.concrete_fields]
+        return queryset.only(*adoption_fields, *self.detail_pet_fields)
     
     def get_serializer_class(self):
         """Use list serializer for list view"""
@@ -119,7 +195,7 @@ class AdoptionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def pending(self, request):
         """Get all pending adoption applications"""
-        pending_apps = Adoption.objects.filter(status='pending')
+        pending_apps = self.get_queryset().filter(status='pending')
         page = self.paginate_queryset(pending_apps)
         if page is not None:
             serializer = AdoptionListSerializer(page, many=True)
@@ -174,7 +250,7 @@ class AdoptionViewSet(viewsets.ModelViewSet):
         )
 
 
-class ContactViewSet(viewsets.ModelViewSet):
+class ContactViewSet(ConditionalGetMixin, FieldSelectionMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Contact form submissions.
     
@@ -187,7 +263,7 @@ class ContactViewSet(viewsets.ModelViewSet):
     serializer_class = ContactSerializer
     permission_classes = [AllowAny]
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RankedOrderingFilter]
     filterset_fields = ['is_read']
     search_fields = ['name', 'email', 'message']
     ordering_fields = ['created_at']
@@ -217,7 +293,7 @@ class ContactViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class VolunteerViewSet(viewsets.ModelViewSet):
+class VolunteerViewSet(ConditionalGetMixin, FieldSelectionMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Volunteer applications.
     
@@ -231,9 +307,9 @@ class VolunteerViewSet(viewsets.ModelViewSet):
     serializer_class = VolunteerSerializer
     permission_classes = [AllowAny]
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['status', 'interest']
-    search_fields = ['name', 'email']
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RankedOrderingFilter]
+    filterset_fields = ['status']
+    search_fields = ['first_name', 'last_name', 'email']
     ordering_fields = ['applied_at', 'status']
     ordering = ['-applied_at']
     
@@ -290,7 +366,7 @@ class VolunteerViewSet(viewsets.ModelViewSet):
         )
 
 
-class DonationViewSet(viewsets.ModelViewSet):
+class DonationViewSet(ConditionalGetMixin, FieldSelectionMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Donations.
     
@@ -315,26 +391,74 @@ class DonationViewSet(viewsets.ModelViewSet):
             return DonationListSerializer
         return DonationSerializer
     
+    # Donation writes also update DonationTotal (see signals), so keep
+    # both in one transaction
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+    
     @action(detail=False, methods=['get'])
     def statistics(self, request):
-        """Get donation statistics"""
-        from django.db.models import Sum, Count, Avg
+        """Get donation statistics from the running totals"""
+        total_amount, total_donations = donation_stats.get_overall()
         
-        stats = Donation.objects.filter(
-            payment_status='completed'
-        ).aggregate(
-            total_amount=Sum('amount'),
-            total_donations=Count('id'),
-            average_amount=Avg('amount')
-        )
+        return Response({
+            'total_amount': total_amount,
+            'total_donations': total_donations,
+            'average_amount': total_amount / total_donations if total_donations else 0,
+            'currency': donation_stats.DEFAULT_CURRENCY
+        })
+    
+    @action(detail=False, methods=['get'])
+    def timeseries(self, request):
+        """
+        Get completed donation totals per hour/day/week/month.
+        
+        Query params: bucket (default day), start and end (ISO dates or
+        datetimes, default the last 30 days).
+
+        Served from the hourly rollup, which is refreshed after each change
+        to a completed donation commits.
+        """
+        bucket = request.query_params.get('bucket', 'day')
+        if bucket not in donation_stats.TIMESERIES_BUCKETS:
+            raise ValidationError({'bucket': f'Must be one of {", ".join(donation_stats.TIMESERIES_BUCKETS)}'})
+        
+        end = self._parse_timestamp('end', timezone.now())
+        start = self._parse_timestamp('start', end - timedelta(days=30))
+        if start >= end:
+            raise ValidationError({'start': 'Must be before end'})
         
         return Response({
-            'total_amount': stats['total_amount'] or 0,
-            'total_donations': stats['total_donations'] or 0,
-            'average_amount': stats['average_amount'] or 0,
-            'currency': 'USD'
+            'bucket': bucket,
+            'start': start,
+            'end': end,
+            'currency': donation_stats.DEFAULT_CURRENCY,
+            'results': donation_stats.timeseries(bucket, start, end),
         })
     
+    def _parse_timestamp(self, param, default):
+        value = self.request.query_params.get(param)
+        if not value:
+            return default
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValidationError({param: 'Must be an ISO date or datetime'})
+            parsed = datetime.combine(day, time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+    
     @action(detail=False, methods=['get'])
     def completed(self, request):
         """Get all completed donations"""
@@ -353,14 +477,15 @@ class DonationViewSet(viewsets.ModelViewSet):
         donation = self.get_object()
         donation.payment_status = 'completed'
         donation.completed_at = None  # Will be set by model
-        donation.save()
+        with transaction.atomic():
+            donation.save()
         return Response(
             {'status': 'Donation marked as completed'},
             status=status.HTTP_200_OK
         )
 
 
-class NewsletterSubscriptionViewSet(viewsets.ModelViewSet):
+class NewsletterSubscriptionViewSet(ConditionalGetMixin, FieldSelectionMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Newsletter Subscriptions.
     
@@ -434,20 +559,119 @@ class NewsletterSubscriptionViewSet(viewsets.ModelViewSet):
             'total_subscribers': NewsletterSubscription.objects.count()
         })
 
+
+class ImageUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                         mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet for resumable chunked uploads of pet images.
+    
+    Features:
+    - Start an upload with the pet, filename and total size
+    - PUT chunks of raw bytes to chunk/ with an Upload-Offset header
+    - Retrieve the upload to get the offset to resume from after a disconnect
+    - Finalize to validate the image and attach it to the pet
+    - Delete to abandon the upload
+    """
+    queryset = ImageUpload.objects.all()
+    serializer_class = ImageUploadSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        """Uploads are only visible to the user who started them"""
+        return super().get_queryset().filter(user=self.request.user)
+    
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+    
+    def perform_destroy(self, instance):
+        uploads.discard(instance)
+    
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        """Append the request body, streamed to disk, at the Upload-Offset header"""
+        upload = self.get_object()
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (KeyError, ValueError):
+            raise ValidationError({'detail': 'Upload-Offset and Content-Length headers are required'})
+        if length <= 0:
+            raise ValidationError({'detail': 'Empty chunk'})
+        if length > settings.CHUNKED_UPLOAD_CHUNK_SIZE:
+            return Response(
+                {'detail': f'Chunks are limited to {settings.CHUNKED_UPLOAD_CHUNK_SIZE} bytes'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        try:
+            offset = uploads.write_chunk(upload, offset, request.stream, length)
+        except uploads.OffsetMismatch as e:
+            return Response(
+                {'detail': str(e), 'offset': e.offset},
+                status=status.HTTP_409_CONFLICT,
+                headers={'Upload-Offset': str(e.offset)}
+            )
+        except uploads.UploadBusy as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        except ValueError as e:
+            raise ValidationError({'detail': str(e)})
+        return Response({'offset': offset}, headers={'Upload-Offset': str(offset)})
+    
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """Validate the assembled image and make it the pet's image"""
+        upload = self.get_object()
+        try:
+            pet = uploads.finalize(upload)
+        except uploads.UploadBusy as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        except ValueError as e:
+            raise ValidationError({'detail': str(e)})
+        return Response(PetSerializer(pet, context=self.get_serializer_context()).data)
+
+
 # ===================================
 # Page Views (for rendering templates)
 # ===================================
 
 def index(request):
     """Homepage view"""
-    pets = Pet.objects.filter(status='available')[:6]
+    # Only the featured pets' ids and versions are looked up per visit; the
+    # grid of cards is a cached fragment keyed on them, so saving any of the
+    # six pets, or a change in which pets are featured, renders a new grid.
+    featured = cache.cached_value(
+        cache.PETS, 'index-featured',
+        lambda: list(Pet.objects.filter(status='available').values_list('id', 'updated_at')[:6])
+    )
     context = {
-        'pets': pets,
+        # Evaluated only when the grid fragment is rendered
+        'pets': Pet.objects.filter(pk__in=[pk for pk, _ in featured]),
+        'featured_version': rendering.featured_pets_version(featured),
     }
-    return render(request, 'index.html', context)
+    return timed_render(request, 'index.html', context)
 
 
 def contact(request):
     """Contact page view"""
     context = {}
-    return render(request, 'contact.html', context)
\ No newline at end of file
+    return timed_render(request, 'contact.html', context)
+
+
+def timed_render(request, template_name, context):
+    """Render a page and report how long each of its fragments took"""
+    response = render(request, template_name, context)
+    timing = rendering.server_timing(request)
+    if timing:
+        response['Server-Timing'] = timing
+    return response
+
+
+def prometheus_metrics(request):
+    """Request latency histograms of all workers, in the Prometheus text format"""
+    if not settings.REQUEST_METRICS:
+        raise Http404
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not constant_time_compare(token, settings.METRICS_TOKEN):
+            raise Http404
+    return HttpResponse(metrics.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
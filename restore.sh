@@ -1,16 +1,22 @@
 #!/bin/bash
-# Script to restore database from JSON
+# Script to restore database from JSON, or from a SQLite snapshot with BACKUP_BACKEND=sqlite
 
 set -e
 
 BACKUP_DIR="${1:-.backups}"
-echo "Loading database from JSON backups in $BACKUP_DIR..."
+BACKUP_BACKEND="${BACKUP_BACKEND:-json}"
 
 if [ ! -d "$BACKUP_DIR" ]; then
     echo "Backup directory $BACKUP_DIR not found!"
     exit 1
 fi
 
-python manage.py load_data --input "$BACKUP_DIR"
+if [ "$BACKUP_BACKEND" = "sqlite" ]; then
+    echo "Restoring SQLite snapshot from $BACKUP_DIR..."
+    python manage.py restore_snapshot --input "$BACKUP_DIR"
+else
+    echo "Loading database from JSON backups in $BACKUP_DIR..."
+    python manage.py load_data --input "$BACKUP_DIR"
+fi
 
 echo "Restore completed successfully!"
@@ -232,6 +232,25 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Filter Bar Counts: show how many pets each option matches
+    const petFilterForm = document.getElementById('petFilterForm');
+    if (petFilterForm) {
+        fetch('/api/v1/pets/facets/')
+            .then(response => response.ok ? response.json() : null)
+            .then(facets => {
+                if (!facets) return;
+                petFilterForm.querySelectorAll('select[data-facet]').forEach(select => {
+                    const counts = facets[select.dataset.facet] || {};
+                    Array.from(select.options).forEach(option => {
+                        if (option.value in counts) {
+                            option.textContent = `${option.textContent} (${counts[option.value]})`;
+                        }
+                    });
+                });
+            })
+            .catch(error => console.error('Filter counts error:', error));
+    }
+
     // Mobile Menu Toggle
     if (elements.mobileMenuBtn && elements.navbar) {
         elements.mobileMenuBtn.addEventListener('click', () => {